@@ -0,0 +1,72 @@
+"""Сколько запросов экономит кеш сессий и пользователей.
+
+Пример запуска из директории проекта:
+
+    python -m benchmarks.auth --seed --news 1000 --comments 50000 \
+        --users 500
+
+Страница новости для автора комментария замеряется дважды: с сессией
+и пользователем из базы, как в Django по умолчанию, и с настройками
+проекта.
+"""
+import argparse
+
+from yacommon import harness
+
+MODES = {
+    'база': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+        'AUTHENTICATION_BACKENDS': [
+            'django.contrib.auth.backends.ModelBackend'
+        ],
+    },
+    'кеш': {},
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--database', default='bench.sqlite3')
+    parser.add_argument('--seed', action='store_true',
+                        help='Наполнить базу перед замерами.')
+    parser.add_argument('--users', type=int, default=50_000)
+    parser.add_argument('--news', type=int, default=100_000)
+    parser.add_argument('--comments', type=int, default=5_000_000)
+    parser.add_argument('--repeat', type=int, default=200,
+                        help='Запросов на каждый сценарий.')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    harness.setup_django('yanews.settings', args.database)
+    if args.seed:
+        from benchmarks.seed import seed
+
+        seed(
+            users=args.users, news=args.news, comments=args.comments
+        )
+    from django.test import Client, override_settings
+    from django.urls import reverse
+
+    from news.models import Comment
+
+    comment = Comment.objects.select_related('author').first()
+    urls = {
+        'detail': reverse('news:detail', args=(comment.news_id,)),
+    }
+    results = {}
+    for mode, overrides in MODES.items():
+        with override_settings(**overrides):
+            # Middleware сессий выбирает хранилище при создании клиента.
+            client = Client(HTTP_HOST=harness.HOST)
+            client.force_login(comment.author)
+            for name, url in urls.items():
+                results[f'{mode}: GET {name}'] = harness.measure(
+                    lambda url=url: client.get(url), args.repeat
+                )
+    harness.report(results)
+
+
+if __name__ == '__main__':
+    main()
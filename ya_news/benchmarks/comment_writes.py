@@ -0,0 +1,88 @@
+"""Потолок записи комментариев без буфера и с буфером.
+
+Пример запуска из директории проекта:
+
+    python -m benchmarks.comment_writes --threads 32 --comments 100
+
+Потоки, как потоки WSGI-сервера, параллельно сохраняют комментарии
+к одной новости через `news.writes.save_comment`: сначала каждый
+отдельной транзакцией, затем через CommentWriteBuffer.
+"""
+import argparse
+import threading
+import time
+
+from yacommon import harness
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--database', default='bench.sqlite3')
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--comments', type=int, default=100,
+                        help='Комментариев на поток.')
+    return parser.parse_args()
+
+
+def run(news, users, args):
+    from django.db import connection
+
+    from news.models import Comment
+    from news.writes import save_comment
+
+    latencies = []
+
+    def post(number):
+        author = users[number % len(users)]
+        for index in range(args.comments):
+            start = time.perf_counter()
+            save_comment(Comment(
+                news=news, author=author, text=f'Комментарий {index}'
+            ))
+            latencies.append((time.perf_counter() - start) * 1000)
+        connection.close()
+
+    threads = [
+        threading.Thread(target=post, args=(number,))
+        for number in range(args.threads)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'writes_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(harness.percentile(latencies, 0.50), 3),
+        'p99_ms': round(harness.percentile(latencies, 0.99), 3),
+    }
+
+
+def main():
+    args = parse_args()
+    harness.setup_django('yanews.settings', args.database)
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+
+    from news.models import News
+
+    news = News.objects.create(title='Срочная новость', text='Текст')
+    users = [
+        get_user_model().objects.get_or_create(username=f'writer{number}')[0]
+        for number in range(args.threads)
+    ]
+    print(f'{args.threads} потоков по {args.comments} комментариев')
+    print(f'{"режим":<10} {"записей/с":>10} {"p50":>8} {"p99":>8}')
+    for mode, enabled in (('без буфера', False), ('буфер', True)):
+        settings.COMMENT_WRITE_BUFFER = enabled
+        result = run(news, users, args)
+        print(
+            f'{mode:<10} {result["writes_per_second"]:>10.1f} '
+            f'{result["p50_ms"]:>8.2f} {result["p99_ms"]:>8.2f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+"""Пропускная способность WSGI и ASGI при медленных клиентах.
+
+Пример запуска из директории проекта:
+
+    python -m benchmarks.concurrency --seed --news 1000 \
+        --comments 50000 --users 500 --clients 64 --slow-ms 50
+
+Каждый режим запускается в отдельном процессе. WSGI моделирует
+сервер с `--workers` потоками: поток занят, пока клиент медленно
+читает ответ. ASGI отдаёт ответ из цикла событий, а view выполняются
+в пуле news.async_views из NEWS_ASYNC_THREADS потоков.
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+from yacommon import harness
+
+MODES = ('wsgi', 'asgi')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--database', default='bench.sqlite3')
+    parser.add_argument('--seed', action='store_true',
+                        help='Наполнить базу перед замерами.')
+    parser.add_argument('--users', type=int, default=50_000)
+    parser.add_argument('--news', type=int, default=100_000)
+    parser.add_argument('--comments', type=int, default=5_000_000)
+    parser.add_argument('--clients', type=int, default=64,
+                        help='Одновременных клиентов.')
+    parser.add_argument('--requests', type=int, default=20,
+                        help='Запросов на каждого клиента.')
+    parser.add_argument('--slow-ms', type=float, default=50,
+                        help='Сколько клиент читает ответ.')
+    parser.add_argument('--workers', type=int, default=8,
+                        help='Потоков WSGI-сервера.')
+    parser.add_argument('--threads', type=int, default=8,
+                        help='NEWS_ASYNC_THREADS для ASGI.')
+    parser.add_argument('--mode', choices=MODES,
+                        help='Замерить один режим в этом процессе.')
+    return parser.parse_args()
+
+
+def get_urls():
+    """Главная и страницы самых обсуждаемых новостей."""
+    from django.urls import reverse
+
+    from news.models import News
+
+    urls = [reverse('news:home')]
+    for pk in News.objects.order_by('-comment_count').values_list(
+        'pk', flat=True
+    )[:10]:
+        urls.append(reverse('news:detail', args=(pk,)))
+        urls.append(reverse('news:comments', args=(pk,)))
+    return urls
+
+
+def summary(latencies, elapsed):
+    latencies.sort()
+    return {
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(harness.percentile(latencies, 0.50), 3),
+        'p95_ms': round(harness.percentile(latencies, 0.95), 3),
+        'p99_ms': round(harness.percentile(latencies, 0.99), 3),
+    }
+
+
+def run_wsgi(urls, args):
+    """Клиенты — потоки, сервер — семафор на `--workers` потоков."""
+    application = harness.WSGIClient()
+    workers = threading.Semaphore(args.workers)
+    latencies = []
+
+    def client(number):
+        for index in range(args.requests):
+            url = urls[(number + index) % len(urls)]
+            start = time.perf_counter()
+            with workers:
+                status = application.get(url)
+                # Поток сервера ждёт, пока клиент дочитает ответ.
+                time.sleep(args.slow_ms / 1000)
+            assert status == 200, (url, status)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    threads = [
+        threading.Thread(target=client, args=(number,))
+        for number in range(args.clients)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summary(latencies, time.perf_counter() - start)
+
+
+async def asgi_get(application, url, slow_ms):
+    parts = urlsplit(url)
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': parts.path,
+        'raw_path': parts.path.encode(),
+        'query_string': parts.query.encode(),
+        'headers': [(b'host', harness.HOST.encode())],
+        'client': ('127.0.0.1', 0),
+        'server': (harness.HOST, 80),
+    }
+    status = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+        elif not message.get('more_body'):
+            # Медленный клиент не занимает поток, только сопрограмму.
+            await asyncio.sleep(slow_ms / 1000)
+
+    await application(scope, receive, send)
+    return status[0]
+
+
+async def run_asgi(urls, args):
+    from django.core.asgi import get_asgi_application
+
+    application = get_asgi_application()
+    latencies = []
+
+    async def client(number):
+        for index in range(args.requests):
+            url = urls[(number + index) % len(urls)]
+            start = time.perf_counter()
+            status = await asgi_get(application, url, args.slow_ms)
+            assert status == 200, (url, status)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(number) for number in range(args.clients)))
+    return summary(latencies, time.perf_counter() - start)
+
+
+def measure(args):
+    """Замер одного режима; результат печатается одной строкой JSON."""
+    harness.setup_django('yanews.settings', args.database)
+    from django.conf import settings
+
+    # Адреса ещё не загружены, поэтому переключатель подействует.
+    settings.NEWS_ASYNC_VIEWS = args.mode == 'asgi'
+    settings.NEWS_ASYNC_THREADS = args.threads
+    settings.REQUEST_TIMING = False
+    urls = get_urls()
+    if args.mode == 'asgi':
+        result = asyncio.run(run_asgi(urls, args))
+    else:
+        result = run_wsgi(urls, args)
+    print(json.dumps(result))
+
+
+def main():
+    args = parse_args()
+    if args.mode:
+        measure(args)
+        return
+    if args.seed:
+        harness.setup_django('yanews.settings', args.database)
+        from benchmarks.seed import seed
+
+        seed(users=args.users, news=args.news, comments=args.comments)
+    options = [
+        arg for arg in sys.argv[1:] if arg != '--seed'
+    ]
+    print(
+        f'{args.clients} клиентов по {args.requests} запросов, '
+        f'чтение ответа {args.slow_ms} мс'
+    )
+    print(f'{"режим":<8} {"RPS":>8} {"p50":>8} {"p95":>8} {"p99":>8}')
+    for mode in MODES:
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.concurrency',
+             *options, '--mode', mode],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        result = json.loads(output.splitlines()[-1])
+        print(
+            f'{mode:<8} {result["rps"]:>8.1f} {result["p50_ms"]:>8.2f} '
+            f'{result["p95_ms"]:>8.2f} {result["p99_ms"]:>8.2f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
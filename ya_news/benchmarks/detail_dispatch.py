@@ -0,0 +1,85 @@
+"""Накладные расходы диспетчеризации страницы новости.
+
+Сравнивает прежний `NewsDetailView`, собиравший `NewsDetail.as_view()`
+на каждый запрос, с текущим, где вложенные view собраны при импорте.
+
+    python -m benchmarks.detail_dispatch --database bench.sqlite3
+"""
+import argparse
+import timeit
+
+from yacommon import harness
+
+REPEAT = 2000
+
+
+def build_per_request_view():
+    """Прежняя реализация, воспроизведённая для сравнения."""
+    from django.views import generic
+
+    from news.views import NewsComment, NewsDetail
+
+    class NewsDetailView(generic.View):
+
+        def get(self, request, *args, **kwargs):
+            view = NewsDetail.as_view()
+            return view(request, *args, **kwargs)
+
+        def post(self, request, *args, **kwargs):
+            view = NewsComment.as_view()
+            return view(request, *args, **kwargs)
+
+    return NewsDetailView.as_view()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--database', default='bench.sqlite3')
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    args = parser.parse_args()
+    harness.setup_django('yanews.settings', args.database)
+
+    from django.contrib.auth.models import AnonymousUser
+    from django.http import HttpResponse
+    from django.test import RequestFactory
+    from django.views import generic
+
+    from news.models import News
+    from news.views import NewsDetailView
+
+    news = News.objects.create(title='Бенчмарк', text='Текст')
+    request = RequestFactory().get(f'/news/{news.pk}/')
+    request.user = AnonymousUser()
+
+    # Только диспетчеризация: view, которая сразу отвечает.
+    class Stub(generic.View):
+        def get(self, request, *args, **kwargs):
+            return HttpResponse()
+
+    prebuilt = Stub.as_view()
+    dispatch = {
+        'as_view() на каждый запрос': lambda: Stub.as_view()(request),
+        'view собрана при импорте': lambda: prebuilt(request),
+    }
+    views = {
+        'прежний NewsDetailView': build_per_request_view(),
+        'текущий NewsDetailView': NewsDetailView.as_view(),
+    }
+    try:
+        print('Диспетчеризация, мкс на запрос:')
+        for name, call in dispatch.items():
+            seconds = timeit.timeit(call, number=args.repeat)
+            print(f'  {name:<30} {seconds / args.repeat * 1e6:8.2f}')
+        print('Страница новости целиком, мкс на запрос:')
+        for name, view in views.items():
+            seconds = timeit.timeit(
+                lambda view=view: view(request, pk=news.pk).render(),
+                number=args.repeat,
+            )
+            print(f'  {name:<30} {seconds / args.repeat * 1e6:8.2f}')
+    finally:
+        news.delete()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""Нагрузочный бенчмарк адресов YaNews.
+
+Пример запуска из директории проекта:
+
+    python -m benchmarks.load --seed --news 1000 --comments 50000 \
+        --users 500 --output baseline.json
+
+Повторный прогон с `--compare baseline.json` завершится с ошибкой,
+если выросло число SQL-запросов или p95 хуже базового больше
+чем на `--tolerance`.
+"""
+import argparse
+import sys
+from http import HTTPStatus
+
+from yacommon import harness
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--database', default='bench.sqlite3')
+    parser.add_argument('--seed', action='store_true',
+                        help='Наполнить базу перед замерами.')
+    parser.add_argument('--users', type=int, default=50_000)
+    parser.add_argument('--news', type=int, default=100_000)
+    parser.add_argument('--comments', type=int, default=5_000_000)
+    parser.add_argument('--repeat', type=int, default=200,
+                        help='Запросов на каждый сценарий.')
+    parser.add_argument('--output', help='Куда сохранить результаты.')
+    parser.add_argument('--compare', help='Базовый прогон для сравнения.')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    return parser.parse_args()
+
+
+def with_cursor(url, cursor):
+    """На маленькой базе следующей страницы может не быть."""
+    return f'{url}?cursor={cursor}' if cursor else url
+
+
+def scenarios():
+    """Сценарии: имя, функция, выполняющая один запрос,
+    и ожидаемый код ответа.
+    """
+    from django.test import Client
+    from django.urls import reverse
+
+    from news.feed import get_feed_page
+    from news.models import Comment, News
+    from news.thread import get_comments_page
+
+    hot_news = News.objects.order_by('-comment_count').first()
+    comment = Comment.objects.filter(news=hot_news).first()
+    anonymous = Client(HTTP_HOST=harness.HOST)
+    author = Client(HTTP_HOST=harness.HOST)
+    author.force_login(comment.author)
+    wsgi_anonymous = harness.WSGIClient()
+    wsgi_author = harness.WSGIClient(author.cookies)
+
+    home_url = reverse('news:home')
+    next_cursor = get_feed_page()[0].next_cursor
+    detail_url = reverse('news:detail', args=(hot_news.pk,))
+    comments_url = reverse('news:comments', args=(hot_news.pk,))
+    comments_cursor = get_comments_page(hot_news.pk).next_cursor
+    get_urls = {
+        'home': home_url,
+        'home, страница 2': with_cursor(home_url, next_cursor),
+        'detail': detail_url,
+        'comments': with_cursor(comments_url, comments_cursor),
+        'edit': reverse('news:edit', args=(comment.pk,)),
+        'delete': reverse('news:delete', args=(comment.pk,)),
+        'login': reverse('users:login'),
+    }
+    for name, url in get_urls.items():
+        client, wsgi = (
+            (author, wsgi_author) if name in ('edit', 'delete')
+            else (anonymous, wsgi_anonymous)
+        )
+        yield (
+            f'client GET {name}', lambda url=url, c=client: c.get(url),
+            HTTPStatus.OK,
+        )
+        yield (
+            f'wsgi GET {name}', lambda url=url, w=wsgi: w.get(url),
+            HTTPStatus.OK,
+        )
+    yield (
+        'client POST detail (комментарий)',
+        lambda: author.post(detail_url, {'text': 'Комментарий из бенчмарка'}),
+        HTTPStatus.FOUND,
+    )
+
+
+def main():
+    args = parse_args()
+    harness.setup_django('yanews.settings', args.database)
+    if args.seed:
+        from benchmarks.seed import seed
+
+        seed(users=args.users, news=args.news, comments=args.comments)
+    results = {
+        name: harness.measure(request, args.repeat, status)
+        for name, request, status in scenarios()
+    }
+    harness.report(results)
+    if args.output:
+        harness.save_baseline(args.output, results, {
+            'users': args.users,
+            'news': args.news,
+            'comments': args.comments,
+        })
+    if args.compare:
+        regressions = harness.compare(args.compare, results, args.tolerance)
+        for regression in regressions:
+            print(f'Регрессия: {regression}', file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""Сравнение проверки комментария на запрещённые слова.
+
+Наивный перебор списка против скомпилированного `ProfanityMatcher`
+на списках разной длины.
+"""
+import random
+import timeit
+
+from news.profanity import ProfanityMatcher
+
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшщыэюя'
+WORDS_COUNTS = (10, 100, 1000, 10000)
+TEXT_WORDS = 60
+REPEAT = 200
+
+
+def random_word(rng):
+    return ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(5, 10)))
+
+
+def naive_search(words, text):
+    lowered_text = text.lower()
+    return any(word in lowered_text for word in words)
+
+
+def main():
+    rng = random.Random(0)
+    text = ' '.join(random_word(rng) for _ in range(TEXT_WORDS))
+    print(f'{"слов":>8} {"перебор, мкс":>14} {"matcher, мкс":>14}')
+    for count in WORDS_COUNTS:
+        words = [random_word(rng) for _ in range(count)]
+        matcher = ProfanityMatcher(words)
+        naive = timeit.timeit(
+            lambda: naive_search(words, text), number=REPEAT
+        )
+        compiled = timeit.timeit(lambda: matcher.search(text), number=REPEAT)
+        print(
+            f'{count:>8} {naive / REPEAT * 1e6:>14.1f} '
+            f'{compiled / REPEAT * 1e6:>14.1f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""Наполнение базы для бенчмарков через пакетный bulk_create."""
+import random
+from datetime import date, timedelta
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from news.models import Comment, News
+
+User = get_user_model()
+
+BATCH_SIZE = 5000
+PASSWORD = 'benchmark'
+# Доля комментариев к самым свежим «горячим» новостям.
+HOT_SHARE = 0.2
+HOT_NEWS = 10
+
+
+def batched(objects, size):
+    """bulk_create превращает аргумент в список, поэтому режем сами."""
+    objects = iter(objects)
+    while batch := list(islice(objects, size)):
+        yield batch
+
+
+def bulk_insert(model, objects, batch_size=BATCH_SIZE):
+    for batch in batched(objects, batch_size):
+        with transaction.atomic():
+            model.objects.bulk_create(batch)
+
+
+def seed(users, news, comments, seed=0):
+    """Создаёт пользователей, новости и комментарии к ним."""
+    rng = random.Random(seed)
+    password = make_password(PASSWORD)
+    bulk_insert(User, (
+        User(username=f'bench-user-{index}', password=password)
+        for index in range(users)
+    ))
+    today = date.today()
+    bulk_insert(News, (
+        News(
+            title=f'Новость {index}',
+            text='Текст новости. ' * rng.randint(5, 50),
+            date=today - timedelta(days=index // 100),
+        )
+        for index in range(news)
+    ))
+    user_ids = list(User.objects.values_list('id', flat=True))
+    news_ids = list(
+        News.objects.order_by('-date', '-id').values_list('id', flat=True)
+    )
+    hot_news_ids = news_ids[:HOT_NEWS]
+    bulk_insert(Comment, (
+        Comment(
+            news_id=rng.choice(
+                hot_news_ids if rng.random() < HOT_SHARE else news_ids
+            ),
+            author_id=rng.choice(user_ids),
+            text='Текст комментария. ' * rng.randint(1, 20),
+        )
+        for _ in range(comments)
+    ))
+    News.objects.recount_comments()
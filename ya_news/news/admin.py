@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Comment, News
+from .models import BannedWord, Comment, Job, News
 
 
 class CommentInline(admin.StackedInline):
@@ -13,3 +13,12 @@ class NewsAdmin(admin.ModelAdmin):
     inlines = [
         CommentInline,
     ]
+
+
+admin.site.register(BannedWord)
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'attempts', 'run_after')
+    list_filter = ('status', 'name')
@@ -0,0 +1,66 @@
+"""Асинхронные варианты страниц чтения для запуска под ASGI.
+
+В Django 3.2 нет асинхронного ORM, поэтому синхронные view целиком,
+вместе с отрисовкой шаблона, выполняются в отдельном ограниченном
+пуле потоков, а цикл событий остаётся свободен для медленных
+клиентов. Размер пула задаёт NEWS_ASYNC_THREADS, он же ограничивает
+число соединений с базой. Включаются настройкой NEWS_ASYNC_VIEWS.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+from . import views
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.NEWS_ASYNC_THREADS,
+    thread_name_prefix='news-async',
+)
+
+
+def run_view(view, request, args, kwargs):
+    """
+    Выполняет view в потоке пула.
+
+    Соединения с базой у каждого потока свои, поэтому устаревшие
+    закрываются здесь, как это делает Django в начале и в конце
+    запроса, а замеры RequestTimingMiddleware подключаются
+    к соединениям этого потока.
+    """
+    close_old_connections()
+    try:
+        with ExitStack() as stack:
+            timing = getattr(request, 'timing', None)
+            if timing is not None:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(timing.queries)
+                    )
+            response = view(request, *args, **kwargs)
+            # Шаблон обращается к базе, поэтому отрисовывается здесь же.
+            if hasattr(response, 'render'):
+                if timing is not None:
+                    timing.start_render(response)
+                response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def async_view(view):
+    """Асинхронная обёртка синхронного view."""
+    run = sync_to_async(run_view, thread_sensitive=False, executor=executor)
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        return await run(view, request, args, kwargs)
+    return wrapper
+
+
+news_list = async_view(views.NewsList.as_view())
+news_detail = async_view(views.NewsDetailView.as_view())
+comment_list = async_view(views.CommentList.as_view())
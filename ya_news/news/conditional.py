@@ -0,0 +1,137 @@
+"""Условные GET-запросы к страницам новостей.
+
+ETag и Last-Modified строятся из меток версий (см. `news.versions`),
+поэтому ответ 304 не требует запросов к таблицам новостей. Метки
+меняются при любом изменении новости или её комментариев.
+
+Метка меняется после фиксации в основной базе, а реплика получает
+изменение с опозданием. Страница, прочитанная из отстающей реплики,
+попала бы в кеш браузера и в кеши ленты и комментариев под новой
+меткой навсегда. Поэтому, пока изменение моложе
+DATABASE_REPLICA_PIN_SECONDS, страница читается из основной базы.
+"""
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+from time import time_ns
+
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from yacommon.routers import primary
+
+from .feed import FEED_VERSION
+from .versions import get_version
+
+
+def news_version(news_id):
+    """Имя версии одной новости вместе с её комментариями."""
+    return f'news:{news_id}'
+
+
+def viewer(request):
+    """
+    Часть ETag, зависящая от пользователя.
+
+    Авторизованный пользователь видит своё имя, ссылки на правку своих
+    комментариев и форму с CSRF-токеном, поэтому в ETag входят его id
+    и отпечаток CSRF-cookie: после нового входа токен другой.
+    """
+    if not request.user.is_authenticated:
+        return 'anonymous'
+    csrf = request.META.get('CSRF_COOKIE', '')
+    digest = hashlib.sha256(
+        (csrf + settings.SECRET_KEY).encode()
+    ).hexdigest()[:16]
+    return f'{request.user.pk}-{digest}'
+
+
+SECOND = 10**9
+
+
+def round_up(version):
+    """Время версии, округлённое вверх до целой секунды HTTP-даты."""
+    return -(-version // SECOND) * SECOND
+
+
+def to_datetime(version):
+    return datetime.fromtimestamp(round_up(version) // SECOND, tz=timezone.utc)
+
+
+def last_modified(version_name):
+    """
+    Last-Modified только для анонимных пользователей: заголовок
+    не различает пользователей и имеет точность в секунду, а ETag
+    учитывает и то и другое.
+
+    Пока не закончилась секунда, до которой округлено время версии,
+    в ней возможно ещё одно изменение с той же датой, и ответ 304
+    по такой дате был бы устаревшим. Тогда заголовок не выдаётся
+    и проверку выполняет только ETag.
+    """
+    def get_last_modified(request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return None
+        version = get_version(version_name(kwargs))
+        if round_up(version) > time_ns():
+            return None
+        return to_datetime(version)
+    return get_last_modified
+
+
+def etag(version_name):
+    def get_etag(request, *args, **kwargs):
+        return f'{get_version(version_name(kwargs))}-{viewer(request)}'
+    return get_etag
+
+
+def is_fresh(version):
+    """Изменение, которое реплики могли ещё не получить."""
+    age = time_ns() - version
+    return age < settings.DATABASE_REPLICA_PIN_SECONDS * SECOND
+
+
+def read_consistently(version_name, view):
+    """
+    Выполняет view, читая свежие изменения из основной базы.
+
+    Версия проверяется после вычисления ETag, поэтому она не старше
+    него: реплика, догнавшая эту версию, содержит и данные ETag.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if is_fresh(get_version(version_name(kwargs))):
+            with primary():
+                return view(request, *args, **kwargs)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def conditional(version_name):
+    """
+    Декоратор view: `version_name(kwargs)` — имя версии страницы.
+
+    Страницы авторизованных пользователей помечаются как private,
+    чтобы их не сохранял общий кеш вроде CDN.
+    """
+    decorator = condition(
+        etag_func=etag(version_name),
+        last_modified_func=last_modified(version_name),
+    )
+
+    def decorate(view):
+        view = decorator(read_consistently(version_name, view))
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = view(request, *args, **kwargs)
+            if request.user.is_authenticated:
+                patch_cache_control(response, private=True)
+            return response
+        return wrapper
+    return decorate
+
+
+feed_conditional = conditional(lambda kwargs: FEED_VERSION)
+news_conditional = conditional(lambda kwargs: news_version(kwargs['pk']))
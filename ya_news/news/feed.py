@@ -0,0 +1,37 @@
+"""Лента новостей для главной страницы.
+
+Первые FEED_CACHE_PAGES страниц ленты хранятся в кеше под ключом
+с версией ленты, которая меняется при любом изменении новостей или
+комментариев (см. `news.signals`). Пока данные не менялись, главная
+страница не обращается к базе данных. Срок жизни FEED_CACHE_SECONDS
+освобождает место от записей старых версий, а кешируются только
+курсоры, выданные самой лентой.
+"""
+from django.conf import settings
+
+from .models import News
+from .pagination import get_cached_page, paginate
+from .versions import get_version
+
+FEED_VERSION = 'feed'
+
+
+def get_feed_page(cursor=None, version=None):
+    """Возвращает страницу ленты, начиная с позиции `cursor`,
+    и признак, что страница кешируется.
+    """
+    if version is None:
+        version = get_version(FEED_VERSION)
+    return get_cached_page(
+        f'news:feed:{version}',
+        cursor,
+        lambda: paginate(
+            News.objects.all(),
+            'date',
+            settings.NEWS_COUNT_ON_HOME_PAGE,
+            cursor=cursor,
+            descending=True,
+        ),
+        settings.FEED_CACHE_PAGES,
+        settings.FEED_CACHE_SECONDS,
+    )
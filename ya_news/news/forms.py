@@ -1,15 +1,20 @@
 from django.forms import ModelForm
-from django.core.exceptions import ValidationError
 
 from .models import Comment
+from .moderation import BadWords
+from .profanity import ProfanityValidator
 
 BAD_WORDS = (
     'редиска',
     'негодяй',
-    # Дополните список на своё усмотрение.
+    # Дополните список на своё усмотрение. Слова можно добавлять
+    # и без выкладки: в файл settings.BAD_WORDS_FILE или в админке.
 )
 WARNING = 'Не ругайтесь!'
 
+bad_words = BadWords(BAD_WORDS)
+validate_profanity = ProfanityValidator(bad_words, WARNING)
+
 
 class CommentForm(ModelForm):
 
@@ -20,8 +25,5 @@ class CommentForm(ModelForm):
     def clean_text(self):
         """Не позволяем ругаться в комментариях."""
         text = self.cleaned_data['text']
-        lowered_text = text.lower()
-        for word in BAD_WORDS:
-            if word in lowered_text:
-                raise ValidationError(WARNING)
+        validate_profanity(text)
         return text
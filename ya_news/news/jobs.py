@@ -0,0 +1,102 @@
+"""Очередь отложенных задач в таблице `Job`.
+
+View только добавляет задачу в той же транзакции, что и свои данные,
+а работу выполняет воркер `python manage.py run_jobs`. Внешний брокер
+не нужен. Воркер забирает задачи пакетами, задачи с одним именем
+обрабатываются одним вызовом обработчика. Упавшие задачи повторяются
+с нарастающей задержкой, после MAX_ATTEMPTS попыток остаются
+в таблице со статусом FAILED.
+
+Обработчики должны быть идемпотентны: задача, чей воркер упал,
+будет выполнена ещё раз после истечения аренды LEASE.
+"""
+import traceback
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .conditional import news_version
+from .feed import FEED_VERSION
+from .models import Job, News
+from .versions import bump_version
+
+BATCH_SIZE = 100
+MAX_ATTEMPTS = 5
+# Сколько задача принадлежит забравшему её воркеру.
+LEASE = timedelta(minutes=5)
+RETRY_DELAY = timedelta(seconds=10)
+
+handlers = {}
+
+
+def handler(name):
+    """Регистрирует обработчик: он получает список payload задач."""
+    def register(function):
+        handlers[name] = function
+        return function
+    return register
+
+
+def enqueue(name, **payload):
+    if name not in handlers:
+        raise ValueError(f'Неизвестная задача {name!r}.')
+    return Job.objects.create(name=name, payload=payload)
+
+
+def claim(batch_size):
+    """Забирает готовые к выполнению задачи и продлевает их аренду."""
+    now = timezone.now()
+    worker = uuid.uuid4().hex
+    due = Job.objects.filter(
+        status=Job.PENDING, run_after__lte=now
+    ).values_list('pk', flat=True)[:batch_size]
+    # Условие на run_after повторяется: задачу мог забрать другой воркер.
+    Job.objects.filter(
+        pk__in=list(due), status=Job.PENDING, run_after__lte=now
+    ).update(worker=worker, run_after=now + LEASE)
+    return list(Job.objects.filter(worker=worker, run_after=now + LEASE))
+
+
+def fail(jobs, error):
+    """Откладывает задачи на повтор или помечает как упавшие."""
+    now = timezone.now()
+    for job in jobs:
+        job.attempts += 1
+        job.last_error = error
+        job.worker = ''
+        if job.attempts >= MAX_ATTEMPTS:
+            job.status = Job.FAILED
+        else:
+            job.run_after = now + RETRY_DELAY * 2 ** (job.attempts - 1)
+    Job.objects.bulk_update(
+        jobs, ('attempts', 'last_error', 'worker', 'status', 'run_after')
+    )
+
+
+def run_pending(batch_size=BATCH_SIZE):
+    """Выполняет один пакет задач, возвращает их число."""
+    jobs = claim(batch_size)
+    groups = defaultdict(list)
+    for job in jobs:
+        groups[job.name].append(job)
+    for name, group in groups.items():
+        try:
+            with transaction.atomic():
+                handlers[name]([job.payload for job in group])
+                Job.objects.filter(pk__in=[job.pk for job in group]).delete()
+        except Exception:
+            fail(group, traceback.format_exc())
+    return len(jobs)
+
+
+@handler('recount_comments')
+def recount_comments(payloads):
+    """Пересчитывает счётчики комментариев у новостей из пакета."""
+    news_ids = {payload['news_id'] for payload in payloads}
+    News.objects.filter(pk__in=news_ids).recount_comments()
+    transaction.on_commit(lambda: bump_version(
+        FEED_VERSION, *(news_version(news_id) for news_id in news_ids)
+    ))
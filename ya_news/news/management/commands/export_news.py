@@ -0,0 +1,17 @@
+from news.models import Comment, News
+from yacommon.transfer import ExportCommand
+
+KINDS = {
+    'news': (News, ('id', 'title', 'text', 'date')),
+    'comments': (
+        Comment, ('id', 'news_id', 'author_id', 'text', 'created')
+    ),
+}
+
+
+class Command(ExportCommand):
+    help = (
+        'Выгружает новости или комментарии в JSONL или CSV; '
+        '«-» вместо файла — вывод в stdout.'
+    )
+    kinds = KINDS
@@ -0,0 +1,69 @@
+from django.db import connection, transaction
+from django.db.models import Max
+
+from news import search
+from news.conditional import news_version
+from news.feed import FEED_VERSION
+from news.management.commands.export_news import KINDS
+from news.models import Comment, News
+from news.versions import bump_version
+from yacommon.transfer import ImportCommand
+
+
+class Command(ImportCommand):
+    help = (
+        'Загружает новости или комментарии из JSONL или CSV '
+        'в формате команды export_news.'
+    )
+    kinds = KINDS
+
+    def import_batch(self, model, records):
+        """
+        bulk_create не вызывает save и сигналы, поэтому id, время
+        комментария, поисковый индекс и счётчики комментариев
+        заполняются здесь же, в транзакции пакета.
+        """
+        objects = [model(**record) for record in records]
+        if not connection.features.can_return_rows_from_bulk_insert:
+            assign_ids(model, objects)
+        if model is Comment:
+            # auto_now_add заменяет время из файла при вставке,
+            # поэтому оно записывается отдельно.
+            created = [
+                comment for comment in objects if comment.created is not None
+            ]
+            times = [comment.created for comment in created]
+            Comment.objects.bulk_create(objects)
+            for comment, time in zip(created, times):
+                comment.created = time
+            Comment.objects.bulk_update(created, ['created'])
+            news_ids = {comment.news_id for comment in objects}
+            News.objects.filter(pk__in=news_ids).recount_comments()
+            transaction.on_commit(lambda: bump_version(
+                *(news_version(news_id) for news_id in news_ids)
+            ))
+        else:
+            News.objects.bulk_create(objects)
+        search.index_many(objects, batch_size=len(objects))
+
+    def finish_import(self, model):
+        bump_version(FEED_VERSION)
+
+
+def assign_ids(model, objects):
+    """
+    Выдаёт id объектам без id: SQLite не возвращает их из bulk_create,
+    а без них не построить поисковый индекс.
+
+    Первая запись в транзакции SQLite блокирует запись в базу до её
+    фиксации, даже если не затронула ни одной строки. Поэтому
+    параллельная вставка не займёт id между чтением Max(id)
+    и bulk_create.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {model._meta.db_table} WHERE 0')
+    next_id = (model.objects.aggregate(Max('id'))['id__max'] or 0) + 1
+    for instance in objects:
+        if instance.pk is None:
+            instance.pk = next_id
+            next_id += 1
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from news.search import BATCH_SIZE, is_supported, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает поисковый индекс новостей и комментариев.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Сколько документов индексировать в одной транзакции.'
+        )
+
+    def handle(self, *args, **options):
+        if not is_supported():
+            raise CommandError('Поисковый индекс есть только в SQLite.')
+        rebuild_index(options['batch_size'])
+        self.stdout.write('Поисковый индекс перестроен.')
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from news.models import News
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики комментариев у новостей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'ids', nargs='*', type=int,
+            help='id новостей; по умолчанию пересчитываются все.'
+        )
+
+    def handle(self, *args, **options):
+        queryset = News.objects.all()
+        if options['ids']:
+            queryset = queryset.filter(pk__in=options['ids'])
+        updated = queryset.recount_comments()
+        self.stdout.write(f'Обновлено новостей: {updated}')
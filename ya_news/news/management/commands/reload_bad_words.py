@@ -0,0 +1,29 @@
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from news.moderation import BAD_WORDS_VERSION
+from news.versions import bump_version
+
+# Такой кеш у каждого процесса свой.
+LOCAL_CACHES = (LocMemCache, DummyCache)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сообщает процессам, что список запрещённых слов изменился, '
+        'например после правки файла BAD_WORDS_FILE. Работает только '
+        'с общим для процессов кешем.'
+    )
+
+    def handle(self, *args, **options):
+        bump_version(BAD_WORDS_VERSION)
+        if isinstance(caches['default'], LOCAL_CACHES):
+            self.stderr.write(self.style.WARNING(
+                'Кеш default не общий для процессов: работающие серверы '
+                'не узнают о новом списке. Настройте общий кеш в CACHES '
+                'или перезапустите серверы.'
+            ))
+            return
+        self.stdout.write('Список запрещённых слов будет перечитан.')
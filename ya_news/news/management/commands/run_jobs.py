@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from news.jobs import BATCH_SIZE, run_pending
+
+
+class Command(BaseCommand):
+    help = 'Выполняет отложенные задачи из таблицы Job.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--interval', type=float, default=1.0,
+            help='Пауза в секундах, когда задач нет.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и завершиться.'
+        )
+
+    def handle(self, *args, **options):
+        done = 0
+        while True:
+            close_old_connections()
+            count = run_pending(options['batch_size'])
+            done += count
+            if count:
+                continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(f'Выполнено задач: {done}')
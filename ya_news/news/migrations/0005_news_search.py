@@ -0,0 +1,84 @@
+from itertools import islice
+
+from django.db import migrations
+
+# Единственный импорт кода приложения, и он сделан намеренно: индекс
+# должен хранить те же основы слов, что поиск получает из запроса
+# текущим analyze. Копия на момент миграции давала бы основы, которых
+# поиск не находит; после изменения стеммера индекс всё равно
+# перестраивают командой rebuild_news_search. Модуль не импортирует
+# модели.
+from news.stemmer import analyze
+
+# Копии значений на момент миграции: их последующие изменения
+# в news.search не должны менять эту миграцию.
+NEWS, COMMENT = 0, 1
+BATCH_SIZE = 2000
+UPSERT_SQL = (
+    'INSERT OR REPLACE INTO news_search(rowid, title, body) '
+    'VALUES (%s, %s, %s)'
+)
+
+# Индекс хранит основы слов после стемминга, а не исходный текст,
+# поэтому заполняется из Python, а не через 'rebuild'. Позиции слов
+# не нужны: фразовых запросов нет, а без них индекс заметно меньше.
+FORWARD = (
+    """
+    CREATE VIRTUAL TABLE news_search USING fts5(
+        title, body,
+        tokenize='unicode61 remove_diacritics 0', detail='column'
+    )
+    """,
+    # Заголовок новости весит больше текста.
+    """
+    INSERT INTO news_search(news_search, rank)
+    VALUES ('rank', 'bm25(5.0, 1.0)')
+    """,
+)
+BACKWARD = (
+    'DROP TABLE IF EXISTS news_search',
+)
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        # На других СУБД поиск работает через icontains.
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return operation
+
+
+def fill(apps, schema_editor):
+    """Индексирует новости и комментарии, созданные до миграции."""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    News = apps.get_model('news', 'News')
+    Comment = apps.get_model('news', 'Comment')
+    documents = [
+        (
+            (news.pk * 2 + NEWS, analyze(news.title), analyze(news.text))
+            for news in News.objects.only('id', 'title', 'text').iterator()
+        ),
+        (
+            (comment.pk * 2 + COMMENT, '', analyze(comment.text))
+            for comment in Comment.objects.only('id', 'text').iterator()
+        ),
+    ]
+    with schema_editor.connection.cursor() as cursor:
+        for rows in documents:
+            while batch := list(islice(rows, BATCH_SIZE)):
+                cursor.executemany(UPSERT_SQL, batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0004_news_comment_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(run(FORWARD), run(BACKWARD)),
+        migrations.RunPython(fill, migrations.RunPython.noop),
+    ]
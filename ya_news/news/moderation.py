@@ -0,0 +1,57 @@
+"""Список запрещённых слов, который можно менять без выкладки.
+
+Слова собираются из базового списка, файла `settings.BAD_WORDS_FILE`
+и таблицы `BannedWord`. Каждый процесс держит скомпилированный
+`ProfanityMatcher` и пересобирает его, только когда в кеше меняется
+версия списка: при правке `BannedWord` (см. `news.signals`) или после
+команды `reload_bad_words`.
+"""
+import threading
+from pathlib import Path
+
+from django.conf import settings
+
+from .models import BannedWord
+from .profanity import ProfanityMatcher
+from .versions import get_version
+
+BAD_WORDS_VERSION = 'bad_words'
+
+
+def read_words_file(path):
+    """Слова из файла: по одному в строке, `#` начинает комментарий."""
+    with Path(path).open(encoding='utf-8') as words_file:
+        for line in words_file:
+            word = line.split('#', 1)[0].strip()
+            if word:
+                yield word
+
+
+class BadWords:
+    """Актуальный набор запрещённых слов для текущего процесса."""
+
+    def __init__(self, base_words=()):
+        self.base_words = tuple(base_words)
+        self.matcher = None
+        self.version = None
+        self.lock = threading.Lock()
+
+    def load_words(self):
+        words = list(self.base_words)
+        if settings.BAD_WORDS_FILE:
+            words.extend(read_words_file(settings.BAD_WORDS_FILE))
+        words.extend(BannedWord.objects.values_list('word', flat=True))
+        return words
+
+    def get_matcher(self):
+        """Возвращает matcher, пересобирая его при смене версии."""
+        version = get_version(BAD_WORDS_VERSION)
+        if version != self.version:
+            with self.lock:
+                if version != self.version:
+                    self.matcher = ProfanityMatcher(self.load_words())
+                    self.version = version
+        return self.matcher
+
+    def search(self, text):
+        return self.get_matcher().search(text)
@@ -0,0 +1,89 @@
+"""Постраничный вывод по ключу (keyset pagination).
+
+Следующая страница выбирается условием «после последней показанной
+записи» по паре (поле сортировки, id), а не через OFFSET, поэтому
+стоимость запроса не растёт по мере листания.
+"""
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import Http404
+from django.utils.encoding import force_str
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+Page = namedtuple('Page', ('object_list', 'next_cursor'))
+
+SEPARATOR = '|'
+# Пределы INTEGER в SQLite: число за ними не передать в запрос.
+MAX_ID = 2 ** 63 - 1
+
+
+def encode_cursor(value, pk):
+    """Упаковывает позицию в строку, безопасную для URL."""
+    raw = f'{value.isoformat()}{SEPARATOR}{pk}'
+    return urlsafe_base64_encode(raw.encode())
+
+
+def decode_cursor(cursor, field):
+    """Распаковывает позицию; при ошибке выбрасывает Http404."""
+    try:
+        raw = force_str(urlsafe_base64_decode(cursor))
+        value, pk = raw.rsplit(SEPARATOR, 1)
+        pk = int(pk)
+        if not -MAX_ID <= pk <= MAX_ID:
+            raise ValueError(pk)
+        return field.to_python(value), pk
+    except (ValueError, ValidationError):
+        raise Http404('Некорректный курсор.')
+
+
+def paginate(queryset, field_name, per_page, cursor=None, descending=False):
+    """Возвращает страницу записей, следующих за курсором."""
+    field = queryset.model._meta.get_field(field_name)
+    direction = '-' if descending else ''
+    lookup = 'lt' if descending else 'gt'
+    queryset = queryset.order_by(direction + field_name, direction + 'pk')
+    if cursor:
+        value, pk = decode_cursor(cursor, field)
+        # Условие записано так, чтобы у SQLite была граница диапазона
+        # по полю сортировки: вариант «a < x OR (a = x AND id < y)»
+        # индексом не ограничивается.
+        queryset = queryset.filter(
+            Q(**{f'{field_name}__{lookup}e': value}),
+            Q(**{f'{field_name}__{lookup}': value})
+            | Q(**{f'pk__{lookup}': pk}),
+        )
+    object_list = list(queryset[:per_page + 1])
+    next_cursor = None
+    if len(object_list) > per_page:
+        object_list = object_list[:per_page]
+        last = object_list[-1]
+        next_cursor = encode_cursor(getattr(last, field_name), last.pk)
+    return Page(object_list, next_cursor)
+
+
+def get_cached_page(prefix, cursor, compute, max_pages, timeout):
+    """Страница из кеша под ключом `prefix` и курсором.
+
+    Возвращает страницу и признак, что она кешируется. Кешируются
+    только первые `max_pages` страниц, и курсор становится кешируемым,
+    лишь когда его выдала закешированная предыдущая страница: курсоры,
+    собранные клиентом, считаются из базы и места в кеше не занимают.
+    """
+    key = f'{prefix}:{cursor or ""}'
+    # Запись — пара (номер страницы, страница); без страницы она лишь
+    # разрешает кешировать выданный курсор.
+    depth, page = cache.get(key, (None if cursor else 0, None))
+    if page is not None:
+        return page, True
+    page = compute()
+    if depth is None:
+        return page, False
+    cache.set(key, (depth, page), timeout)
+    if page.next_cursor and depth + 1 < max_pages:
+        cache.add(
+            f'{prefix}:{page.next_cursor}', (depth + 1, None), timeout
+        )
+    return page, True
@@ -1,13 +1,32 @@
-from time import sleep
+from time import sleep, time_ns
 
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
 from django.urls import reverse
 from django.utils import timezone
 import pytest
 
+from news import conditional
 from news.models import Comment, News
 from yanews import settings
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+@pytest.fixture
+def second_later(monkeypatch):
+    """Часы условных запросов на секунду впереди: секунда последнего
+    изменения закончилась, и Last-Modified уже выдаётся.
+    """
+    monkeypatch.setattr(
+        conditional, 'time_ns', lambda: time_ns() + conditional.SECOND
+    )
+
+
 @pytest.fixture
 def user(django_user_model):
     return django_user_model.objects.create(username='Пользователь')
@@ -31,11 +50,21 @@ def another_user_client(another_user, client):
 
 
 @pytest.fixture
-def news():
-    news = News.objects.create(
-        title='Текст заголовка',
-        text='Текст новости'
-    )
+def committed(django_capture_on_commit_callbacks):
+    """Выполняет обработчики on_commit, как после фиксации транзакции:
+    иначе изменения в тесте считались бы той же транзакцией, что и
+    данные фикстур.
+    """
+    return lambda: django_capture_on_commit_callbacks(execute=True)
+
+
+@pytest.fixture
+def news(committed):
+    with committed():
+        news = News.objects.create(
+            title='Текст заголовка',
+            text='Текст новости'
+        )
     return news
 
 
@@ -50,12 +79,18 @@ def news_id_for_url(news):
 
 
 @pytest.fixture
-def comment(news, user):
-    comment = Comment.objects.create(
-        news=news,
-        text='Текст комментария',
-        author=user
-    )
+def news_comments_url(news):
+    return f'{news.id}/comments/'
+
+
+@pytest.fixture
+def comment(news, user, committed):
+    with committed():
+        comment = Comment.objects.create(
+            news=news,
+            text='Текст комментария',
+            author=user
+        )
     return comment
 
 
@@ -79,12 +114,13 @@ def couple_of_news():
 
 
 @pytest.fixture
-def couple_of_comments(news, user):
+def couple_of_comments(news, user, committed):
     couple_of_comments = []
     for index in range(3):
-        couple_of_comments.append(Comment.objects.create(
-            news=news, author=user, text=f'Tекст №{index}'
-        ))
+        with committed():
+            couple_of_comments.append(Comment.objects.create(
+                news=news, author=user, text=f'Tекст №{index}'
+            ))
         sleep(0.000001)
     return couple_of_comments
 
@@ -124,3 +160,20 @@ def delete_comment_url(comment_id_for_args):
 def edit_comment_url(comment_id_for_args):
     url = reverse('news:edit', args=comment_id_for_args)
     return url
+
+
+@pytest.fixture
+def replica(db, tmp_path, settings):
+    """Реплика для чтения — отдельный файл SQLite со своими данными."""
+    alias = 'replica'
+    connections.databases[alias] = {
+        **connections.databases['default'],
+        'NAME': str(tmp_path / 'replica.sqlite3'),
+        'TEST': {},
+    }
+    call_command('migrate', database=alias, verbosity=0)
+    settings.DATABASE_REPLICAS = [alias]
+    yield alias
+    connections[alias].close()
+    del connections[alias]
+    del connections.databases[alias]
@@ -1,7 +1,23 @@
+from http import HTTPStatus
+from io import StringIO
+from pathlib import Path
+import subprocess
+import sys
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management import call_command
+from django.template.loaders.filesystem import Loader
+from django.test import Client, override_settings
+from django.urls import reverse
 import pytest
 
+from news import async_views
 from news.models import Comment, News
-from yanews import settings
+from news.pagination import encode_cursor
+from yacommon import auth
+from yanews import settings, settings_production
 
 
 @pytest.mark.django_db
@@ -26,6 +42,120 @@ def test_news_order(client, couple_of_news, home_url):
     assert all_dates == all_dates_from_db[:settings.NEWS_COUNT_ON_HOME_PAGE]
 
 
+@pytest.mark.django_db
+def test_news_next_page(client, couple_of_news, home_url):
+    """Новости, не попавшие на главную, доступны по курсору."""
+    response = client.get(home_url)
+    next_cursor = response.context['next_cursor']
+    assert next_cursor
+    response = client.get(home_url, {'cursor': next_cursor})
+    object_list = response.context['object_list']
+    assert [news.title for news in object_list] == [couple_of_news[-1].title]
+    assert response.context['next_cursor'] is None
+
+
+@pytest.mark.django_db
+def test_feed_caches_only_own_cursors(
+    client, couple_of_news, home_url, django_assert_num_queries, settings
+):
+    """В кеш попадают только первые FEED_CACHE_PAGES страниц ленты
+    и только по курсорам, которые выдала сама лента.
+    """
+    next_cursor = client.get(home_url).context['next_cursor']
+    client.get(home_url, {'cursor': next_cursor})
+    with django_assert_num_queries(0):
+        client.get(home_url, {'cursor': next_cursor})
+    # Корректный курсор, которого лента не выдавала.
+    news = News.objects.earliest('date')
+    minted = encode_cursor(news.date, news.pk)
+    for _ in range(2):
+        with django_assert_num_queries(1):
+            response = client.get(home_url, {'cursor': minted})
+        assert response.status_code == HTTPStatus.OK
+        assert not response.context['feed_cached']
+    cache.clear()
+    settings.FEED_CACHE_PAGES = 1
+    client.get(home_url)
+    response = client.get(home_url, {'cursor': next_cursor})
+    assert not response.context['feed_cached']
+
+
+@pytest.mark.django_db
+def test_cached_home_page_sees_new_news(
+    client,
+    couple_of_news,
+    home_url,
+    django_assert_num_queries,
+    django_capture_on_commit_callbacks
+):
+    """Главная страница берётся из кеша, пока новости не изменились."""
+    client.get(home_url)
+    with django_assert_num_queries(0):
+        client.get(home_url)
+    with django_capture_on_commit_callbacks(execute=True):
+        fresh_news = News.objects.create(title='Свежая', text='Текст')
+    response = client.get(home_url)
+    assert response.context['object_list'][0] == fresh_news
+
+
+@pytest.mark.django_db
+def test_news_detail_not_modified(
+    client, news, news_detail_url, user, django_capture_on_commit_callbacks
+):
+    """Без изменений страница новости отдаётся ответом 304,
+    новый комментарий меняет ETag.
+    """
+    response = client.get(news_detail_url)
+    etag = response['ETag']
+    response = client.get(news_detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    with django_capture_on_commit_callbacks(execute=True):
+        Comment.objects.create(news=news, author=user, text='Новый')
+    response = client.get(news_detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert response['ETag'] != etag
+
+
+@pytest.mark.django_db
+def test_home_page_not_modified_since(
+    client, couple_of_news, home_url, django_assert_num_queries, second_later
+):
+    """Анонимный пользователь получает 304 по Last-Modified
+    без запросов к базе данных.
+    """
+    response = client.get(home_url)
+    with django_assert_num_queries(0):
+        response = client.get(
+            home_url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+@pytest.mark.django_db
+def test_conditional_headers_depend_on_user(
+    user_client, news_detail_url, second_later
+):
+    """Страница авторизованного пользователя имеет свой ETag,
+    не имеет Last-Modified и не сохраняется общими кешами.
+    """
+    anonymous_response = Client().get(news_detail_url)
+    response = user_client.get(news_detail_url)
+    assert response['ETag'] != anonymous_response['ETag']
+    assert 'Last-Modified' in anonymous_response
+    assert 'Last-Modified' not in response
+    assert 'private' in response['Cache-Control']
+
+
+@pytest.mark.django_db
+def test_no_last_modified_within_second_of_change(client, news_detail_url):
+    """В секунду изменения страница проверяется только по ETag:
+    ещё одно изменение в ту же секунду не дало бы новой даты.
+    """
+    response = client.get(news_detail_url)
+    assert 'ETag' in response
+    assert 'Last-Modified' not in response
+
+
 @pytest.mark.django_db
 def test_comments_order(client, couple_of_comments, news, news_detail_url):
     """Комментарии на странице отдельной новости отсортированы в
@@ -40,6 +170,114 @@ def test_comments_order(client, couple_of_comments, news, news_detail_url):
     assert all_dates == all_dates_from_db
 
 
+@pytest.mark.django_db
+def test_comments_pagination(
+    client, couple_of_comments, news, news_detail_url, settings
+):
+    """На странице новости выводится первая страница комментариев,
+    остальные подгружаются фрагментами по курсору.
+    """
+    settings.COMMENTS_COUNT_ON_PAGE = 2
+    response = client.get(news_detail_url)
+    first_page = response.context['comments']
+    assert [
+        comment.text in first_page.html for comment in couple_of_comments
+    ] == [True, True, False]
+    comments_url = reverse('news:comments', args=(news.pk,))
+    response = client.get(comments_url, {'cursor': first_page.next_cursor})
+    next_page = response.context['comments']
+    assert [
+        comment.text in next_page.html for comment in couple_of_comments
+    ] == [False, False, True]
+    assert next_page.next_cursor is None
+
+
+@pytest.mark.django_db
+def test_comments_cache_only_own_cursors(
+    client, couple_of_comments, news, django_assert_num_queries
+):
+    """Страница комментариев по курсору, которого ветка не выдавала,
+    каждый раз читается из базы и в кеш не попадает.
+    """
+    comments_url = reverse('news:comments', args=(news.pk,))
+    comment = Comment.objects.get(pk=couple_of_comments[0].pk)
+    minted = encode_cursor(comment.created, comment.pk)
+    for _ in range(2):
+        # Проверка новости и сама страница.
+        with django_assert_num_queries(2):
+            response = client.get(comments_url, {'cursor': minted})
+        assert couple_of_comments[1].text in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_comments_cache_has_no_models(
+    client, couple_of_comments, news_detail_url
+):
+    """В кеш ветки комментариев попадает только HTML и курсор,
+    без объектов моделей и данных авторов.
+    """
+    response = client.get(news_detail_url)
+    thread = response.context['comments']
+    assert all(
+        isinstance(value, (str, bool, type(None))) for value in thread
+    )
+
+
+@pytest.mark.django_db
+def test_search(client, comment, news, settings):
+    """Поиск находит другие формы слов, выводит результаты постранично
+    и видит изменения комментариев.
+    """
+    settings.SEARCH_RESULTS_ON_PAGE = 1
+    search_url = reverse('news:search')
+    response = client.get(search_url, {'q': 'текстом'})
+    page = response.context['page']
+    assert page.object_list == [(news, None)]
+    assert page.has_next
+    response = client.get(search_url, {'q': 'текстом', 'page': 2})
+    page = response.context['page']
+    assert page.object_list == [(news, comment)]
+    assert not page.has_next
+    response = client.get(search_url, {'q': 'текстом', 'page': 10 ** 30})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    comment.text = 'Другие слова'
+    comment.save()
+    response = client.get(search_url, {'q': 'комментарии'})
+    assert response.context['object_list'] == []
+    response = client.get(search_url, {'q': 'другое слово'})
+    assert response.context['object_list'] == [(news, comment)]
+    comment.delete()
+    response = client.get(search_url, {'q': 'другое слово'})
+    assert response.context['object_list'] == []
+
+
+@pytest.mark.django_db
+def test_comment_thread_is_cached(
+    comment, user, another_user, news_detail_url,
+    django_assert_num_queries, django_capture_on_commit_callbacks
+):
+    """Ветка комментариев отрисовывается один раз для всех
+    пользователей, ссылки на правку видит только автор.
+    """
+    edit_url = reverse('news:edit', args=(comment.pk,))
+    author_client, reader_client = Client(), Client()
+    author_client.force_login(user)
+    reader_client.force_login(another_user)
+    response = author_client.get(news_detail_url)
+    assert edit_url in response.content.decode()
+    # Пользователь и новость: сессия читается из кеша.
+    with django_assert_num_queries(2):
+        response = reader_client.get(news_detail_url)
+    content = response.content.decode()
+    assert comment.text in content
+    assert edit_url not in content
+    with django_capture_on_commit_callbacks(execute=True):
+        comment.text = 'Исправленный комментарий'
+        comment.save()
+    response = reader_client.get(news_detail_url)
+    assert comment.text in response.content.decode()
+
+
 @pytest.mark.django_db
 @pytest.mark.parametrize(
     'parametrized_client, form_in_list',
@@ -56,3 +294,82 @@ def test_form_availability_for_different_users(
     """
     response = parametrized_client.get(news_detail_url)
     assert ('form' in response.context) is form_in_list
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_news_detail(rf, comment, news, news_detail_url):
+    """Асинхронный вариант страницы новости выполняется в пуле потоков
+    и отдаёт ту же страницу с комментариями.
+    """
+    request = rf.get(news_detail_url)
+    request.user = AnonymousUser()
+    response = async_to_sync(async_views.news_detail)(request, pk=news.pk)
+    assert response.status_code == HTTPStatus.OK
+    content = response.content.decode()
+    assert news.title in content
+    assert comment.text in content
+
+
+@pytest.mark.django_db
+def test_user_is_cached_until_changed(
+    user, user_client, home_url, django_assert_num_queries
+):
+    """Сессия и пользователь берутся из кеша, пока пользователя
+    не изменят.
+    """
+    user_client.get(home_url)
+    with django_assert_num_queries(0):
+        user_client.get(home_url)
+    user.username = 'Новое имя'
+    user.save()
+    assert user.username in user_client.get(home_url).content.decode()
+
+
+@pytest.mark.django_db
+def test_user_cache_follows_other_processes(
+    django_user_model, user, user_client, home_url
+):
+    """Пользователь, изменённый другим процессом, перечитывается
+    по версии в общем кеше, не дожидаясь конца срока.
+    """
+    user_client.get(home_url)
+    django_user_model.objects.filter(pk=user.pk).update(is_active=False)
+    auth.bump_user_version(user.pk)
+    response = user_client.get(home_url)
+    assert not response.context['user'].is_authenticated
+
+
+def test_user_signals_connected_in_every_process():
+    """Команды manage.py, не проверявшие авторизацию, тоже меняют
+    версию пользователя при его сохранении.
+    """
+    check = (
+        'from django.contrib.auth import get_user_model;'
+        'from django.db.models.signals import post_save;'
+        'print(post_save.has_listeners(get_user_model()))'
+    )
+    manage = Path(settings.BASE_DIR, 'manage.py')
+    result = subprocess.run(
+        [sys.executable, manage, 'shell', '-c', check],
+        capture_output=True, text=True, check=True,
+    )
+    assert result.stdout.strip() == 'True'
+
+
+@pytest.mark.django_db
+def test_templates_are_warmed_up(
+    client, comment, news_detail_url, monkeypatch
+):
+    """После warm_templates страница новости отрисовывается
+    без чтения файлов шаблонов.
+    """
+    with override_settings(TEMPLATES=settings_production.TEMPLATES):
+        call_command('warm_templates', stdout=StringIO())
+
+        def read_template(self, origin):
+            raise AssertionError(f'Шаблон {origin.name} прочитан заново.')
+
+        monkeypatch.setattr(Loader, 'get_contents', read_template)
+        response = client.get(news_detail_url)
+    assert response.status_code == HTTPStatus.OK
+    assert comment.text in response.content.decode()
@@ -1,10 +1,19 @@
+import threading
 from http import HTTPStatus
+from io import StringIO
+from time import time_ns
 
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import Client
 from pytest_django.asserts import assertRedirects, assertFormError
 import pytest
 
+from news import conditional, jobs, search as news_search, writes
 from news.forms import BAD_WORDS, WARNING
-from news.models import Comment
+from news.models import BannedWord, Comment, Job, News
+from news.search import search
+from yacommon.routers import PIN_COOKIE
 
 
 @pytest.mark.django_db
@@ -52,6 +61,49 @@ def test_user_cant_use_bad_words(user_client, news_detail_url):
     assert comments_count == 0
 
 
+@pytest.mark.parametrize(
+    'disguised_word',
+    ('РЕДИСКА', 'рeдискa', 'редииисска', 'нег0дяй'),
+)
+def test_user_cant_disguise_bad_words(
+    user_client, news_detail_url, disguised_word
+):
+    """Запрещённые слова находятся независимо от регистра,
+    латинских букв-двойников и повторов букв.
+    """
+    bad_words_data = {'text': f'Какой-то текст, {disguised_word}!'}
+    response = user_client.post(news_detail_url, data=bad_words_data)
+    assertFormError(response, form='form', field='text', errors=WARNING)
+    assert Comment.objects.count() == 0
+
+
+def test_banned_words_are_reloaded(
+    user_client, news_detail_url, django_capture_on_commit_callbacks
+):
+    """Слова, добавленные в BannedWord, запрещены без перезапуска."""
+    data = {'text': 'Ну ты и бармалей'}
+    with django_capture_on_commit_callbacks(execute=True):
+        BannedWord.objects.create(word='бармалей')
+    response = user_client.post(news_detail_url, data=data)
+    assertFormError(response, form='form', field='text', errors=WARNING)
+    assert Comment.objects.count() == 0
+
+
+def test_bad_words_file(user_client, news_detail_url, settings, tmp_path):
+    """Слова из файла BAD_WORDS_FILE подхватываются после перезагрузки."""
+    words_file = tmp_path / 'bad_words.txt'
+    words_file.write_text('# Комментарий\nзлодей\n', encoding='utf-8')
+    settings.BAD_WORDS_FILE = words_file
+    stderr = StringIO()
+    call_command('reload_bad_words', stdout=StringIO(), stderr=stderr)
+    # Версия меняется и в локальном кеше, но о том, что другие процессы
+    # её не увидят, команда предупреждает.
+    assert 'не общий' in stderr.getvalue()
+    response = user_client.post(news_detail_url, data={'text': 'Злодей!'})
+    assertFormError(response, form='form', field='text', errors=WARNING)
+    assert Comment.objects.count() == 0
+
+
 def test_author_can_delete_comment(
     user_client, delete_comment_url, news_detail_url
 ):
@@ -65,6 +117,26 @@ def test_author_can_delete_comment(
     assert comments_count_after == 0
 
 
+def test_comment_count_follows_comments(
+    user_client, form_data, news, news_detail_url, another_user, committed
+):
+    """Счётчик комментариев пересчитывается после создания и удаления
+    комментария и через сайт, и через ORM.
+    """
+    with committed():
+        user_client.post(news_detail_url, data=form_data)
+    with committed():
+        Comment.objects.create(news=news, author=another_user, text='Ещё')
+    call_command('run_jobs', '--once', stdout=StringIO())
+    news.refresh_from_db()
+    assert news.comment_count == 2
+    with committed():
+        Comment.objects.filter(author=another_user).delete()
+    call_command('run_jobs', '--once', stdout=StringIO())
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+
 def test_user_cant_delete_comment_of_another_user(
     another_user_client, delete_comment_url
 ):
@@ -104,3 +176,297 @@ def test_user_cant_edit_comment_of_another_user(
     comment.refresh_from_db()
     assert comment.text != form_data['text']
     assert comment.author != another_user
+
+
+@pytest.mark.django_db
+def test_recount_comments_command(couple_of_comments, news):
+    """Команда recount_comments восстанавливает счётчики комментариев."""
+    news.refresh_from_db()
+    assert news.comment_count == 0
+    call_command('recount_comments', stdout=StringIO())
+    news.refresh_from_db()
+    assert news.comment_count == len(couple_of_comments)
+
+
+@pytest.mark.django_db
+def test_one_recount_per_news_in_transaction(
+    couple_of_comments, news, committed, django_capture_on_commit_callbacks
+):
+    """За транзакцию ставится одна задача на новость, удаление новости
+    с комментариями задач и лишних смен версий не ставит.
+    """
+    Job.objects.all().delete()
+    with committed():
+        Comment.objects.filter(pk__in=[
+            comment.pk for comment in couple_of_comments[1:]
+        ]).delete()
+    assert Job.objects.filter(name='recount_comments').count() == 1
+    Job.objects.all().delete()
+    with django_capture_on_commit_callbacks() as callbacks:
+        news.delete()
+    assert not Job.objects.exists()
+    assert len(callbacks) == 2
+
+
+@pytest.mark.django_db
+def test_jobs_are_batched_and_retried(couple_of_comments, news, monkeypatch):
+    """Задачи с одним именем выполняются одним вызовом, упавшие
+    откладываются на повтор, а после MAX_ATTEMPTS помечаются FAILED.
+    """
+    # Задачи, поставленные при создании комментариев фикстуры.
+    Job.objects.all().delete()
+    jobs.enqueue('recount_comments', news_id=news.pk)
+    jobs.enqueue('recount_comments', news_id=news.pk)
+    calls = []
+    handler = jobs.handlers['recount_comments']
+    monkeypatch.setitem(jobs.handlers, 'recount_comments', lambda payloads: (
+        calls.append(payloads), handler(payloads)
+    ))
+    assert jobs.run_pending() == 2
+    assert len(calls) == 1
+    assert not Job.objects.exists()
+    news.refresh_from_db()
+    assert news.comment_count == len(couple_of_comments)
+
+    def broken(payloads):
+        raise RuntimeError('сбой')
+
+    monkeypatch.setitem(jobs.handlers, 'recount_comments', broken)
+    job = jobs.enqueue('recount_comments', news_id=news.pk)
+    created = job.run_after
+    for attempt in range(1, jobs.MAX_ATTEMPTS + 1):
+        Job.objects.filter(pk=job.pk).update(run_after=created)
+        assert jobs.run_pending() == 1
+        job.refresh_from_db()
+        assert job.attempts == attempt
+        assert 'сбой' in job.last_error
+    assert job.status == Job.FAILED
+    assert jobs.run_pending() == 0
+
+
+@pytest.mark.django_db
+def test_rebuild_news_search_command(couple_of_news):
+    """bulk_create минует сигналы, команда rebuild_news_search
+    добавляет такие новости в поисковый индекс.
+    """
+    assert search('новость', 1, 50).object_list == []
+    call_command('rebuild_news_search', stdout=StringIO())
+    found = [result.news for result in search('новость', 1, 50).object_list]
+    assert {news.title for news in found} == {
+        news.title for news in couple_of_news
+    }
+
+
+@pytest.mark.django_db
+def test_search_news_among_many_comments(news, user, monkeypatch):
+    """Новые комментарии со словом запроса не вытесняют новость
+    из кандидатов на ранжирование.
+    """
+    monkeypatch.setattr(news_search, 'SEARCH_CANDIDATES', 2)
+    Comment.objects.bulk_create(
+        Comment(news=news, author=user, text=f'Текст {index}')
+        for index in range(5)
+    )
+    news_search.rebuild_index()
+    found = search('текст', 1, 50).object_list
+    assert (news, None) in found
+    assert len(found) == 3
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('file_format', ('jsonl', 'csv'))
+def test_export_and_import_news(comment, news, file_format, tmp_path):
+    """Новости и комментарии переносятся через файлы без потерь,
+    время комментария сохраняется, счётчики и индекс заполняются.
+    """
+    news.refresh_from_db()
+    news_path = tmp_path / f'news.{file_format}'
+    comments_path = tmp_path / f'comments.{file_format}'
+    call_command('export_news', 'news', news_path, stderr=StringIO())
+    call_command('export_news', 'comments', comments_path, stderr=StringIO())
+    News.objects.all().delete()
+    call_command('import_news', 'news', news_path, stdout=StringIO())
+    call_command(
+        'import_news', 'comments', comments_path, stdout=StringIO()
+    )
+    imported = Comment.objects.select_related('news').get()
+    assert (imported.pk, imported.text, imported.created) == (
+        comment.pk, comment.text, comment.created
+    )
+    assert (imported.news.pk, imported.news.title, imported.news.date) == (
+        news.pk, news.title, news.date
+    )
+    assert imported.news.comment_count == 1
+    assert search('комментарий', 1, 50).object_list == [
+        (imported.news, imported)
+    ]
+
+
+@pytest.mark.django_db
+def test_import_news_resumes_from_checkpoint(tmp_path):
+    """Повторный запуск продолжает загрузку с контрольной точки."""
+    path = tmp_path / 'news.jsonl'
+    path.write_text(''.join(
+        f'{{"title": "Новость {index}", "text": "Текст"}}\n'
+        for index in range(3)
+    ), encoding='utf-8')
+    (tmp_path / 'news.jsonl.checkpoint').write_text('2')
+    call_command('import_news', 'news', path, stdout=StringIO())
+    assert list(News.objects.values_list('title', flat=True)) == [
+        'Новость 2'
+    ]
+    assert not (tmp_path / 'news.jsonl.checkpoint').exists()
+
+
+@pytest.mark.django_db
+def test_export_news_resumes_from_checkpoint(couple_of_news, tmp_path):
+    """Продолжение выгрузки отбрасывает строки после контрольной точки."""
+    path = tmp_path / 'news.jsonl'
+    call_command('export_news', 'news', path, stderr=StringIO())
+    lines = path.read_text(encoding='utf-8').splitlines(keepends=True)
+    first = lines[0].encode()
+    path.write_bytes(first + lines[1].encode()[:10])
+    first_id = News.objects.order_by('pk').values_list('pk', flat=True)[0]
+    (tmp_path / 'news.jsonl.checkpoint').write_text(
+        f'{first_id} {len(first)}'
+    )
+    call_command('export_news', 'news', path, stderr=StringIO())
+    assert path.read_text(encoding='utf-8').splitlines(keepends=True) == lines
+
+
+@pytest.mark.django_db(transaction=True)
+def test_import_comments_of_missing_news(user, tmp_path):
+    """Комментарий к несуществующей новости — ошибка команды."""
+    path = tmp_path / 'comments.jsonl'
+    path.write_text(
+        f'{{"news_id": 1, "author_id": {user.pk}, "text": "Текст"}}\n',
+        encoding='utf-8',
+    )
+    with pytest.raises(CommandError, match='Записи 1-1'):
+        call_command('import_news', 'comments', path, stdout=StringIO())
+    assert not Comment.objects.exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_comment_write_buffer_groups_writes(news, user, monkeypatch):
+    """Параллельные комментарии записываются одной транзакцией,
+    и каждый запрос дожидается её фиксации.
+    """
+    batches = []
+    write_comments = writes.write_comments
+    monkeypatch.setattr(writes, 'write_comments', lambda comments: (
+        batches.append(len(comments)), write_comments(comments)
+    ))
+    buffer = writes.CommentWriteBuffer(max_batch=5, max_delay=5)
+    saved = []
+
+    def post(number):
+        comment = Comment(news=news, author=user, text=f'Комментарий {number}')
+        buffer.save(comment)
+        saved.append(comment.pk)
+        connection.close()
+
+    threads = [
+        threading.Thread(target=post, args=(number,)) for number in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert batches == [5]
+    assert sorted(saved) == sorted(
+        Comment.objects.values_list('pk', flat=True)
+    )
+    # Пачка записана одной транзакцией: одна задача на новость.
+    assert Job.objects.filter(name='recount_comments').count() == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_comment_write_buffer_timeout(news, user, monkeypatch):
+    """Комментарий, который ведущий не забрал вовремя, запрос
+    сохраняет сам, и ведущий его не повторяет.
+    """
+    batches = []
+    write_comments = writes.write_comments
+    monkeypatch.setattr(writes, 'write_comments', lambda comments: (
+        batches.append(len(comments)), write_comments(comments)
+    ))
+    buffer = writes.CommentWriteBuffer(max_batch=5, max_delay=1, timeout=0.1)
+    leader = threading.Thread(target=lambda: (
+        buffer.save(Comment(news=news, author=user, text='Первый')),
+        connection.close(),
+    ))
+    leader.start()
+    while not buffer.pending:
+        pass
+    buffer.save(Comment(news=news, author=user, text='Второй'))
+    leader.join()
+    assert batches == [1, 1]
+    assert Comment.objects.count() == 2
+
+
+@pytest.mark.django_db(transaction=True)
+def test_comment_write_buffer_leader_failure(news, user, monkeypatch):
+    """Сбой ведущего передаётся ожидающим запросам, а не вешает их."""
+    def fail(comments):
+        raise KeyboardInterrupt
+    monkeypatch.setattr(writes, 'write_comments', fail)
+    buffer = writes.CommentWriteBuffer(max_batch=2, max_delay=5)
+    errors = []
+
+    def post(number):
+        try:
+            buffer.save(Comment(news=news, author=user, text=f'{number}'))
+        except KeyboardInterrupt:
+            errors.append(number)
+
+    threads = [
+        threading.Thread(target=post, args=(number,)) for number in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+    assert sorted(errors) == [0, 1]
+
+
+def test_reads_go_to_replica_until_write(
+    replica, news, user_client, form_data, news_detail_url,
+    django_capture_on_commit_callbacks, monkeypatch
+):
+    """Давно не менявшиеся страницы читают новости из реплики,
+    а после отправки комментария браузер читает из основной базы
+    и видит его.
+    """
+    News.objects.using(replica).create(
+        pk=news.pk, title='Заголовок из реплики', text='Текст'
+    )
+    with monkeypatch.context() as patch:
+        patch.setattr(
+            conditional, 'time_ns', lambda: time_ns() + 60 * conditional.SECOND
+        )
+        response = Client().get(news_detail_url)
+    assert 'Заголовок из реплики' in response.content.decode()
+    with django_capture_on_commit_callbacks(execute=True):
+        response = user_client.post(news_detail_url, data=form_data)
+    assert PIN_COOKIE in response.cookies
+    assert Comment.objects.using('default').count() == 1
+    assert not Comment.objects.using(replica).exists()
+    content = user_client.get(news_detail_url).content.decode()
+    assert news.title in content
+    assert form_data['text'] in content
+
+
+def test_fresh_changes_are_read_from_primary(
+    replica, news, news_detail_url
+):
+    """Пока изменение моложе DATABASE_REPLICA_PIN_SECONDS, страница
+    читается из основной базы: отставшая реплика попала бы в кеши
+    под новой версией.
+    """
+    News.objects.using(replica).create(
+        pk=news.pk, title='Заголовок из реплики', text='Текст'
+    )
+    content = Client().get(news_detail_url).content.decode()
+    assert news.title in content
+    assert 'Заголовок из реплики' not in content
@@ -0,0 +1,163 @@
+import json
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+import pytest
+
+from news.forms import bad_words
+
+# Пользователь загружается из базы при первом запросе, затем берётся
+# из кеша процесса; сессия читается из кеша.
+AUTH_QUERIES = 1
+
+
+def query_plan(sql):
+    """Шаги плана выполнения запроса в SQLite."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def assert_no_full_scans(client, url, data=None):
+    """Ни один запрос страницы не читает таблицу целиком
+    и не сортирует строки во временном B-дереве.
+    """
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, data)
+    for query in context.captured_queries:
+        for step in query_plan(query['sql']):
+            full_scan = step.startswith('SCAN ') and 'USING' not in step
+            assert not full_scan, f'{step}: {query["sql"]}'
+            assert 'TEMP B-TREE' not in step, f'{step}: {query["sql"]}'
+    return response
+
+
+@pytest.fixture(autouse=True)
+def bad_words_matcher(db):
+    """Список запрещённых слов читается из базы один раз на процесс."""
+    return bad_words.get_matcher()
+
+
+@pytest.mark.django_db
+def test_comment_create_queries(
+    user_client, form_data, news_detail_url, django_assert_max_num_queries
+):
+    """Новость: 1 запрос; комментарий, поисковый индекс и счётчик:
+    3 запроса и 2 на точку сохранения транзакции.
+    """
+    with django_assert_max_num_queries(AUTH_QUERIES + 6):
+        user_client.post(news_detail_url, data=form_data)
+
+
+@pytest.mark.django_db
+def test_news_detail_queries(
+    user_client, couple_of_comments, news_detail_url,
+    django_assert_max_num_queries
+):
+    """Новость и страница комментариев вместе с авторами."""
+    with django_assert_max_num_queries(AUTH_QUERIES + 2):
+        user_client.get(news_detail_url)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'url, max_queries',
+    (
+        (pytest.lazy_fixture('edit_comment_url'), AUTH_QUERIES + 1),
+        (pytest.lazy_fixture('delete_comment_url'), AUTH_QUERIES + 1),
+    ),
+)
+def test_comment_pages_queries(
+    user_client, url, max_queries, django_assert_max_num_queries
+):
+    """Комментарий загружается вместе с новостью одним запросом."""
+    with django_assert_max_num_queries(max_queries):
+        user_client.get(url)
+
+
+@pytest.mark.django_db
+def test_comment_edit_queries(
+    user_client, edit_comment_url, form_data, django_assert_max_num_queries
+):
+    """Загрузка и обновление комментария и поискового индекса;
+    адрес возврата строится без дополнительных запросов.
+    """
+    with django_assert_max_num_queries(AUTH_QUERIES + 3):
+        user_client.post(edit_comment_url, data=form_data)
+
+
+@pytest.mark.django_db
+def test_comment_delete_queries(
+    user_client, delete_comment_url, django_assert_max_num_queries
+):
+    """Загрузка и удаление комментария, удаление из поискового индекса,
+    обновление счётчика и 2 запроса на точку сохранения транзакции.
+    """
+    with django_assert_max_num_queries(AUTH_QUERIES + 6):
+        user_client.post(delete_comment_url)
+
+
+@pytest.mark.django_db
+def test_news_list_query_plans(client, couple_of_news, home_url):
+    """Лента выбирается по индексу (date, id) на всех страницах."""
+    response = assert_no_full_scans(client, home_url)
+    next_cursor = response.context['next_cursor']
+    assert_no_full_scans(client, home_url, {'cursor': next_cursor})
+
+
+@pytest.mark.django_db
+def test_news_detail_query_plans(
+    user_client, couple_of_comments, news, news_detail_url, settings
+):
+    """Комментарии выбираются по индексу (news_id, created)."""
+    settings.COMMENTS_COUNT_ON_PAGE = 2
+    response = assert_no_full_scans(user_client, news_detail_url)
+    comments_url = reverse('news:comments', args=(news.pk,))
+    next_cursor = response.context['comments'].next_cursor
+    assert_no_full_scans(user_client, comments_url, {'cursor': next_cursor})
+
+
+@pytest.mark.django_db
+def test_sqlite_pragmas(settings):
+    """Соединение настроено согласно settings.SQLITE_PRAGMAS."""
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA busy_timeout')
+        busy_timeout, = cursor.fetchone()
+        cursor.execute('PRAGMA temp_store')
+        temp_store, = cursor.fetchone()
+    assert busy_timeout == settings.SQLITE_PRAGMAS['busy_timeout']
+    # 2 — MEMORY.
+    assert temp_store == 2
+
+
+@pytest.mark.django_db
+def test_server_timing_header(
+    client, couple_of_comments, news_detail_url, settings, caplog
+):
+    """Замеры запроса попадают в заголовок Server-Timing и журнал."""
+    settings.REQUEST_TIMING = True
+    settings.REQUEST_TIMING_LOG = True
+    with caplog.at_level('INFO', logger='yacommon.middleware'):
+        response = client.get(news_detail_url)
+    server_timing = response['Server-Timing']
+    for metric in ('db;dur=', '2 queries', 'view;dur=', 'render;dur='):
+        assert metric in server_timing
+    record = json.loads(caplog.records[-1].getMessage())
+    assert record['path'] == news_detail_url
+    assert record['queries'] == 2
+    assert record['duplicate_queries'] == 0
+
+
+@pytest.mark.django_db
+def test_view_timing_without_template(
+    user_client, delete_comment_url, settings, caplog
+):
+    """У ответа без шаблона время view не включает остальные middleware."""
+    settings.REQUEST_TIMING_LOG = True
+    with caplog.at_level('INFO', logger='yacommon.middleware'):
+        response = user_client.post(delete_comment_url)
+    assert response.status_code == 302
+    record = json.loads(caplog.records[-1].getMessage())
+    assert 0 < record['view_ms'] < record['total_ms']
+    assert record['render_ms'] == 0
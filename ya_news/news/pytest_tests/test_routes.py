@@ -1,8 +1,11 @@
 from http import HTTPStatus
 
+from django.utils.http import urlsafe_base64_encode
 from pytest_django.asserts import assertRedirects
 import pytest
 
+from news.pagination import SEPARATOR
+
 
 @pytest.mark.django_db
 @pytest.mark.parametrize(
@@ -10,6 +13,8 @@ import pytest
     (
         ('/', ''),
         ('/news/', pytest.lazy_fixture('news_id_for_url')),
+        ('/news/', pytest.lazy_fixture('news_comments_url')),
+        ('/search/', ''),
         ('/auth/login/', ''),
         ('/auth/logout/', ''),
         ('/auth/signup/', '')
@@ -58,3 +63,24 @@ def test_redirect_for_anonymous_user(client, comment, name):
     expected_url = f'{login_url}?next={url}'
     response = client.get(url)
     assertRedirects(response, expected_url)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'cursor',
+    (
+        'not-a-cursor',
+        urlsafe_base64_encode(f'2024-01-01{SEPARATOR}{10 ** 30}'.encode()),
+    ),
+)
+def test_invalid_feed_cursor(client, cursor):
+    """Некорректный курсор ленты не приводит к ошибке сервера."""
+    response = client.get('/', {'cursor': cursor})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_comments_of_missing_news(client):
+    """Страницы комментариев несуществующей новости нет."""
+    response = client.get('/news/1/comments/')
+    assert response.status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,182 @@
+"""Полнотекстовый поиск по новостям и комментариям.
+
+Индекс — таблица SQLite FTS5, в которую записываются основы слов
+после стемминга. Новости и комментарии лежат в одной таблице:
+rowid новости чётный, комментария — нечётный. Документы обновляются
+по одному при сохранении и удалении, а `rebuild_index` перестраивает
+индекс целиком пакетами.
+"""
+from collections import namedtuple
+from itertools import islice
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .models import Comment, News
+from .stemmer import WORD, analyze
+
+SEARCH_TABLE = 'news_search'
+NEWS, COMMENT = 0, 1
+# Каждое слово запроса — отдельный обход индекса.
+MAX_TERMS = 8
+BATCH_SIZE = 2000
+# Ранжируются только последние добавленные совпадения, отдельно среди
+# новостей и среди комментариев: частое слово встречается в миллионах
+# комментариев, и bm25 для каждого из них — секунды. Отдельный отбор
+# не даёт комментариям вытеснить новости.
+SEARCH_CANDIDATES = 1000
+
+UPSERT_SQL = (
+    f'INSERT OR REPLACE INTO {SEARCH_TABLE}(rowid, title, body) '
+    f'VALUES (%s, %s, %s)'
+)
+DELETE_SQL = f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s'
+# Последние добавленные совпадения одного вида: rowid растёт с id.
+CANDIDATES_SQL = (
+    f'SELECT * FROM ('
+    f'SELECT rowid, rank FROM {SEARCH_TABLE} '
+    f'WHERE {SEARCH_TABLE} MATCH %s AND rowid %% 2 = {{kind}} '
+    f'ORDER BY rowid DESC LIMIT %s)'
+)
+SEARCH_SQL = (
+    f'SELECT rowid FROM ('
+    f'{CANDIDATES_SQL.format(kind=NEWS)} UNION ALL '
+    f'{CANDIDATES_SQL.format(kind=COMMENT)}'
+    f') ORDER BY rank LIMIT %s OFFSET %s'
+)
+
+SearchResult = namedtuple('SearchResult', 'news comment')
+SearchPage = namedtuple('SearchPage', 'object_list number has_next')
+
+
+def is_supported():
+    return connection.vendor == 'sqlite'
+
+
+def document(instance):
+    """rowid и колонки документа индекса для новости или комментария."""
+    if isinstance(instance, News):
+        return (
+            instance.pk * 2 + NEWS,
+            analyze(instance.title),
+            analyze(instance.text),
+        )
+    return instance.pk * 2 + COMMENT, '', analyze(instance.text)
+
+
+def index(instance):
+    """Добавляет или заменяет документ в индексе."""
+    if is_supported():
+        with connection.cursor() as cursor:
+            cursor.execute(UPSERT_SQL, document(instance))
+
+
+def unindex(instance):
+    if is_supported():
+        kind = NEWS if isinstance(instance, News) else COMMENT
+        with connection.cursor() as cursor:
+            cursor.execute(DELETE_SQL, [instance.pk * 2 + kind])
+
+
+def index_many(instances, batch_size=BATCH_SIZE):
+    """Индексирует объекты пакетами, по транзакции на пакет."""
+    if not is_supported():
+        return
+    instances = iter(instances)
+    while batch := list(islice(instances, batch_size)):
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(UPSERT_SQL, [
+                document(instance) for instance in batch
+            ])
+
+
+def rebuild_index(batch_size=BATCH_SIZE):
+    """Заново индексирует все новости и комментарии."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+    index_many(
+        News.objects.only('id', 'title', 'text').iterator(batch_size),
+        batch_size,
+    )
+    index_many(
+        Comment.objects.only('id', 'text').iterator(batch_size),
+        batch_size,
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')"
+        )
+
+
+def get_terms(query):
+    """Основы слов запроса без повторов."""
+    return list(dict.fromkeys(analyze(query).split()))[:MAX_TERMS]
+
+
+def last_page(per_page):
+    """Номер последней страницы, на которой могут быть результаты."""
+    return -(-2 * SEARCH_CANDIDATES // per_page)
+
+
+def search(query, page_number, per_page):
+    """
+    Страница результатов поиска от самых релевантных среди
+    SEARCH_CANDIDATES последних совпадений каждого вида.
+
+    Для каждого совпадения возвращается SearchResult: новость
+    и, если совпал комментарий, сам комментарий.
+    """
+    terms = get_terms(query)
+    if not terms:
+        return SearchPage([], page_number, False)
+    offset = (page_number - 1) * per_page
+    if is_supported():
+        match = ' '.join(f'"{term}"' for term in terms)
+        with connection.cursor() as cursor:
+            cursor.execute(SEARCH_SQL, [
+                match, SEARCH_CANDIDATES, match, SEARCH_CANDIDATES,
+                per_page + 1, offset,
+            ])
+            rowids = [row[0] for row in cursor.fetchall()]
+    else:
+        rowids = fallback_search(query, per_page + 1, offset)
+    has_next = len(rowids) > per_page
+    rowids = rowids[:per_page]
+    news = News.objects.in_bulk(
+        [rowid // 2 for rowid in rowids if rowid % 2 == NEWS]
+    )
+    comments = Comment.objects.select_related('news').in_bulk(
+        [rowid // 2 for rowid in rowids if rowid % 2 == COMMENT]
+    )
+    results = []
+    for rowid in rowids:
+        # Документ мог быть удалён между запросами.
+        if rowid % 2 == NEWS and rowid // 2 in news:
+            results.append(SearchResult(news[rowid // 2], None))
+        elif rowid % 2 == COMMENT and rowid // 2 in comments:
+            comment = comments[rowid // 2]
+            results.append(SearchResult(comment.news, comment))
+    return SearchPage(results, page_number, has_next)
+
+
+def fallback_search(query, limit, offset):
+    """Поиск без индекса для СУБД, отличных от SQLite: сначала новости,
+    затем комментарии, в обоих случаях от новых к старым.
+    """
+    words = WORD.findall(query)
+    news_condition, comment_condition = Q(), Q()
+    for word in words:
+        news_condition &= Q(title__icontains=word) | Q(text__icontains=word)
+        comment_condition &= Q(text__icontains=word)
+    news_ids = News.objects.filter(news_condition).values_list(
+        'id', flat=True
+    )[:offset + limit]
+    rowids = [pk * 2 + NEWS for pk in news_ids]
+    if len(rowids) < offset + limit:
+        comment_ids = Comment.objects.filter(
+            comment_condition
+        ).order_by('-created', '-id').values_list('id', flat=True)[
+            :offset + limit - len(rowids)
+        ]
+        rowids += [pk * 2 + COMMENT for pk in comment_ids]
+    return rowids[offset:offset + limit]
@@ -0,0 +1,117 @@
+import threading
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import search
+from .conditional import news_version
+from .feed import FEED_VERSION
+from .jobs import enqueue
+from .models import BannedWord, Comment, News
+from .moderation import BAD_WORDS_VERSION
+from .versions import bump_version
+
+local = threading.local()
+
+
+def transaction_keys(using):
+    """Ключи, отмеченные в текущей транзакции базы `using`.
+
+    Каждый ключ держит свой обработчик в on_commit. Фиксация и откат
+    (в том числе до точки сохранения) заменяют список обработчиков
+    соединения новым, тогда из ключей остаются только те, чьи
+    обработчики ещё ждут фиксации.
+    """
+    connection = transaction.get_connection(using)
+    hooks, keys = getattr(local, 'transactions', {}).get(using, (None, {}))
+    if hooks is not connection.run_on_commit:
+        waiting = {func for sids, func in connection.run_on_commit}
+        keys = {key: func for key, func in keys.items() if func in waiting}
+        local.__dict__.setdefault('transactions', {})[using] = (
+            connection.run_on_commit, keys
+        )
+    return keys
+
+
+def once_per_transaction(key, using, func=lambda: None):
+    """Отмечает key в текущей транзакции и вызывает func после её
+    фиксации. Возвращает False, если key уже отмечен: тогда func
+    не вызывается.
+    """
+    keys = transaction_keys(using)
+    if key in keys:
+        return False
+    if transaction.get_connection(using).in_atomic_block:
+        def on_commit():
+            keys.pop(key, None)
+            func()
+        keys[key] = on_commit
+        transaction.on_commit(on_commit, using)
+    else:
+        func()
+    return True
+
+
+@receiver((post_save, post_delete), sender=News)
+@receiver((post_save, post_delete), sender=Comment)
+def invalidate_feed(sender, instance, using, **kwargs):
+    """Лента показывает и новости, и число комментариев к ним,
+    страница новости — саму новость и комментарии.
+
+    Версия меняется после фиксации транзакции: иначе параллельный
+    запрос успеет закешировать ещё не обновлённые данные под новой версией.
+    Меняется она один раз на новость за транзакцию, сколько бы
+    комментариев ни изменилось.
+    """
+    news_id = instance.pk if sender is News else instance.news_id
+    once_per_transaction(
+        ('bump_version', news_id),
+        using,
+        lambda: bump_version(FEED_VERSION, news_version(news_id)),
+    )
+
+
+@receiver((post_save, post_delete), sender=BannedWord)
+def reload_bad_words(sender, **kwargs):
+    """Процессы пересоберут список запрещённых слов при следующей проверке."""
+    transaction.on_commit(lambda: bump_version(BAD_WORDS_VERSION))
+
+
+@receiver(post_save, sender=News)
+@receiver(post_save, sender=Comment)
+def index_document(sender, instance, update_fields=None, **kwargs):
+    """Индекс обновляется в той же транзакции, что и сама запись."""
+    if update_fields is None or {'title', 'text'} & set(update_fields):
+        search.index(instance)
+
+
+@receiver(post_delete, sender=News)
+@receiver(post_delete, sender=Comment)
+def unindex_document(sender, instance, **kwargs):
+    search.unindex(instance)
+
+
+@receiver(pre_delete, sender=News)
+def mark_deleted_news(sender, instance, using, **kwargs):
+    """Каскадное удаление комментариев удаляемой новости
+    не пересчитывает её счётчик.
+    """
+    once_per_transaction(('delete_news', instance.pk), using)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def recount_comments(sender, instance, using, created=True, **kwargs):
+    """
+    Счётчик комментариев новости пересчитывает воркер run_jobs, задача
+    ставится в той же транзакции при любом создании и удалении
+    комментария: через сайт, админку, ORM или фикстуры. За транзакцию
+    ставится одна задача на новость. bulk_create сигналов не вызывает,
+    после него счётчики пересчитываются явно.
+    """
+    news_id = instance.news_id
+    if not created or ('delete_news', news_id) in transaction_keys(using):
+        return
+    if once_per_transaction(('recount_comments', news_id), using):
+        enqueue('recount_comments', news_id=news_id)
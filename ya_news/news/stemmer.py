@@ -0,0 +1,143 @@
+"""Стеммер русского языка по алгоритму Snowball.
+
+Отсекает окончания и суффиксы, чтобы разные формы слова
+(«новость», «новости», «новостями») попадали в индекс одной основой.
+"""
+import re
+from functools import lru_cache
+
+VOWELS = frozenset('аеиоуыэюя')
+STEM_CACHE_SIZE = 65536
+WORD = re.compile(r'\w+')
+
+
+def compile_endings(after_a, plain):
+    """Окончания от длинных к коротким с признаком первой группы:
+    её окончания допустимы только после «а» или «я».
+    """
+    endings = [(ending, True) for ending in after_a]
+    endings += [(ending, False) for ending in plain]
+    return sorted(endings, key=lambda item: -len(item[0]))
+
+
+PERFECTIVE_GERUND = compile_endings(
+    ('в', 'вши', 'вшись'),
+    ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'),
+)
+ADJECTIVE = compile_endings((), (
+    'ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем',
+    'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю',
+    'ая', 'яя', 'ою', 'ею',
+))
+PARTICIPLE = compile_endings(
+    ('ем', 'нн', 'вш', 'ющ', 'щ'),
+    ('ивш', 'ывш', 'ующ'),
+)
+REFLEXIVE = compile_endings((), ('ся', 'сь'))
+VERB = compile_endings(
+    (
+        'ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но',
+        'ет', 'ют', 'ны', 'ть', 'ешь', 'нно',
+    ),
+    (
+        'ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей',
+        'уй', 'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят',
+        'ует', 'уют', 'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю',
+    ),
+)
+NOUN = compile_endings((), (
+    'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии',
+    'и', 'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам',
+    'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия',
+    'ья', 'я',
+))
+SUPERLATIVE = compile_endings((), ('ейш', 'ейше'))
+DERIVATIONAL = ('ость', 'ост')
+
+
+def remove_ending(word, endings):
+    """Отрезает самое длинное подходящее окончание.
+
+    Если окончания нет или оно не стоит после «а»/«я», когда это
+    требуется, возвращает None.
+    """
+    for ending, after_a in endings:
+        if word.endswith(ending):
+            stem = word[:-len(ending)]
+            if after_a and not stem.endswith(('а', 'я')):
+                return None
+            return stem
+    return None
+
+
+def regions(word):
+    """Начала областей RV и R2 из описания алгоритма."""
+    rv = next(
+        (index + 1 for index, char in enumerate(word) if char in VOWELS),
+        len(word)
+    )
+    r1 = r2 = len(word)
+    for index in range(1, len(word)):
+        if word[index] not in VOWELS and word[index - 1] in VOWELS:
+            if r1 == len(word):
+                r1 = index + 1
+            elif index > r1:
+                r2 = index + 1
+                break
+    return rv, r2
+
+
+def remove_inflection(rv):
+    """Шаг 1: деепричастие или возвратная частица и одно
+    из окончаний прилагательного, глагола или существительного.
+    """
+    result = remove_ending(rv, PERFECTIVE_GERUND)
+    if result is not None:
+        return result
+    reflexive = remove_ending(rv, REFLEXIVE)
+    if reflexive is not None:
+        rv = reflexive
+    result = remove_ending(rv, ADJECTIVE)
+    if result is not None:
+        participle = remove_ending(result, PARTICIPLE)
+        return result if participle is None else participle
+    for endings in (VERB, NOUN):
+        result = remove_ending(rv, endings)
+        if result is not None:
+            return result
+    return rv
+
+
+def remove_tail(rv):
+    """Шаг 4: двойное «н», превосходная степень или мягкий знак."""
+    if rv.endswith('нн'):
+        return rv[:-1]
+    result = remove_ending(rv, SUPERLATIVE)
+    if result is not None:
+        return result[:-1] if result.endswith('нн') else result
+    return rv[:-1] if rv.endswith('ь') else rv
+
+
+@lru_cache(maxsize=STEM_CACHE_SIZE)
+def stem(word):
+    """Основа слова; слово должно быть в нижнем регистре."""
+    word = word.replace('ё', 'е')
+    rv_start, r2_start = regions(word)
+    prefix, rv = word[:rv_start], remove_inflection(word[rv_start:])
+    # Шаг 2.
+    if rv.endswith('и'):
+        rv = rv[:-1]
+    # Шаг 3: словообразовательный суффикс, целиком лежащий в R2.
+    for ending in DERIVATIONAL:
+        if (
+            rv.endswith(ending)
+            and rv_start + len(rv) - len(ending) >= r2_start
+        ):
+            rv = rv[:-len(ending)]
+            break
+    return prefix + remove_tail(rv)
+
+
+def analyze(text):
+    """Основы слов текста через пробел."""
+    return ' '.join(stem(word) for word in WORD.findall(text.lower()))
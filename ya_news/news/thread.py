@@ -0,0 +1,75 @@
+"""Ветка комментариев к новости.
+
+В кеше под ключом с версией новости (см. `news.conditional`),
+которая меняется при создании, правке и удалении комментариев,
+хранится только отрисованный HTML страницы комментариев, признак
+наличия комментариев и курсор следующей страницы. Объекты моделей
+в кеш не попадают: вместе с автором туда ушли бы хеш пароля и почта.
+Как и у ленты, кешируются первые COMMENTS_CACHE_PAGES страниц
+по выданным курсорам и на COMMENTS_CACHE_SECONDS секунд.
+Ссылки на правку и удаление у каждого пользователя свои, поэтому
+в кешированном HTML на их месте стоят метки, которые заменяются
+для конкретного пользователя одним проходом регулярного выражения.
+"""
+import re
+from collections import namedtuple
+
+from django.conf import settings
+from django.template.loader import get_template, render_to_string
+from django.utils.safestring import mark_safe
+
+from .conditional import news_version
+from .models import Comment
+from .pagination import get_cached_page, paginate
+from .versions import get_version
+
+CONTROLS = re.compile(r'<!--controls:(\d+):(\d+)-->')
+
+Thread = namedtuple('Thread', ('html', 'has_comments', 'next_cursor'))
+
+
+def get_comments_page(news_id, cursor=None):
+    """Страница комментариев к новости в хронологическом порядке."""
+    return paginate(
+        Comment.objects.filter(news_id=news_id).select_related('author'),
+        'created',
+        settings.COMMENTS_COUNT_ON_PAGE,
+        cursor=cursor,
+    )
+
+
+def get_thread(news_id, cursor=None):
+    """HTML страницы комментариев без ссылок для пользователя,
+    признак наличия комментариев и курсор следующей страницы.
+    """
+    def render():
+        page = get_comments_page(news_id, cursor)
+        html = render_to_string(
+            'news/comments.html', {'page': page, 'news_id': news_id}
+        )
+        return Thread(html, bool(page.object_list), page.next_cursor)
+
+    version = get_version(news_version(news_id))
+    thread, _ = get_cached_page(
+        f'news:thread:{version}:{news_id}',
+        cursor,
+        render,
+        settings.COMMENTS_CACHE_PAGES,
+        settings.COMMENTS_CACHE_SECONDS,
+    )
+    return thread
+
+
+def add_controls(html, user):
+    """Ставит ссылки на правку и удаление у комментариев `user`
+    и убирает остальные метки.
+    """
+    template = get_template('news/comment_controls.html')
+
+    def replace(match):
+        author_id, comment_id = map(int, match.groups())
+        if author_id != user.pk:
+            return ''
+        return template.render({'comment_id': comment_id})
+
+    return mark_safe(CONTROLS.sub(replace, html))
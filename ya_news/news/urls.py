@@ -1,12 +1,26 @@
+from django.conf import settings
 from django.urls import path
 
 from news import views
 
 app_name = 'news'
 
+if settings.NEWS_ASYNC_VIEWS:
+    from news import async_views
+
+    news_list = async_views.news_list
+    news_detail = async_views.news_detail
+    comment_list = async_views.comment_list
+else:
+    news_list = views.NewsList.as_view()
+    news_detail = views.NewsDetailView.as_view()
+    comment_list = views.CommentList.as_view()
+
 urlpatterns = [
-    path('', views.NewsList.as_view(), name='home'),
-    path('news/<int:pk>/', views.NewsDetailView.as_view(), name='detail'),
+    path('', news_list, name='home'),
+    path('news/<int:pk>/', news_detail, name='detail'),
+    path('news/<int:pk>/comments/', comment_list, name='comments'),
+    path('search/', views.NewsSearch.as_view(), name='search'),
     path(
         'delete_comment/<int:pk>/',
         views.CommentDelete.as_view(),
@@ -0,0 +1,25 @@
+"""Версии закешированных данных.
+
+Вместо удаления ключей из кеша мы меняем метку версии, которая входит
+в ключ: старые записи перестают читаться и со временем вытесняются.
+Меткой служит момент последнего изменения в наносекундах, поэтому
+после очистки кеша версия не может совпасть с прежней.
+"""
+import time
+
+from django.core.cache import cache
+
+KEY_TEMPLATE = 'news:version:{}'
+
+
+def get_version(name):
+    """Текущая версия набора данных `name`."""
+    return cache.get_or_set(KEY_TEMPLATE.format(name), time.time_ns, None)
+
+
+def bump_version(*names):
+    """Объявляет закешированные данные устаревшими."""
+    version = time.time_ns()
+    cache.set_many(
+        {KEY_TEMPLATE.format(name): version for name in names}, None
+    )
@@ -1,13 +1,21 @@
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.shortcuts import get_object_or_404
+from django.http import Http404
 from django.urls import reverse
+from django.utils.decorators import method_decorator
 from django.views import generic
 
+from .conditional import feed_conditional, news_conditional
+from .feed import FEED_VERSION, get_feed_page
 from .forms import CommentForm
 from .models import Comment, News
+from .search import last_page, search
+from .thread import add_controls, get_thread
+from .versions import get_version
+from .writes import save_comment
 
 
+@method_decorator(feed_conditional, name='get')
 class NewsList(generic.ListView):
     """Список новостей."""
     model = News
@@ -17,23 +25,48 @@ class NewsList(generic.ListView):
         """
         Выводим только несколько последних новостей.
 
-        Их количество определяется в настройках проекта.
+        Их количество определяется в настройках проекта, следующие
+        страницы выбираются по курсору из параметра `cursor`.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        self.feed_version = get_version(FEED_VERSION)
+        self.page, self.cached = get_feed_page(
+            self.request.GET.get('cursor'), self.feed_version
+        )
+        return self.page.object_list
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['next_cursor'] = self.page.next_cursor
+        context['feed_version'] = self.feed_version
+        context['feed_cached'] = self.cached
+        context['feed_cache_seconds'] = settings.FEED_CACHE_SECONDS
+        return context
 
-class NewsDetail(generic.DetailView):
-    model = News
-    template_name = 'news/detail.html'
 
-    def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
+class CommentsPageMixin:
+    """Добавляет в контекст страницу комментариев к новости и её HTML
+    со ссылками для текущего пользователя.
+    """
+
+    def get_news_id(self):
+        return self.object.pk
+
+    def get_cursor(self):
+        return None
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        thread = get_thread(self.get_news_id(), self.get_cursor())
+        context['comments'] = thread
+        context['comments_html'] = add_controls(
+            thread.html, self.request.user
         )
-        return obj
+        return context
+
+
+class NewsDetail(CommentsPageMixin, generic.DetailView):
+    model = News
+    template_name = 'news/detail.html'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -44,6 +77,7 @@ class NewsDetail(generic.DetailView):
 
 class NewsComment(
         LoginRequiredMixin,
+        CommentsPageMixin,
         generic.detail.SingleObjectMixin,
         generic.FormView
 ):
@@ -59,23 +93,67 @@ class NewsComment(
         comment = form.save(commit=False)
         comment.news = self.object
         comment.author = self.request.user
-        comment.save()
+        save_comment(comment)
         return super().form_valid(form)
 
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        return reverse(
+            'news:detail', kwargs={'pk': self.object.pk}
+        ) + '#comments'
 
 
 class NewsDetailView(generic.View):
+    """Страница новости: GET показывает её, POST добавляет комментарий.
+
+    Вложенные view собираются один раз при импорте модуля,
+    а не заново на каждый запрос.
+    """
+    detail_view = staticmethod(NewsDetail.as_view())
+    comment_view = staticmethod(NewsComment.as_view())
 
+    @method_decorator(news_conditional)
     def get(self, request, *args, **kwargs):
-        view = NewsDetail.as_view()
-        return view(request, *args, **kwargs)
+        return self.detail_view(request, *args, **kwargs)
 
     def post(self, request, *args, **kwargs):
-        view = NewsComment.as_view()
-        return view(request, *args, **kwargs)
+        return self.comment_view(request, *args, **kwargs)
+
+
+@method_decorator(news_conditional, name='get')
+class CommentList(CommentsPageMixin, generic.TemplateView):
+    """Следующие страницы комментариев: фрагмент для страницы новости."""
+    template_name = 'news/comments_page.html'
+
+    def get_news_id(self):
+        if not News.objects.filter(pk=self.kwargs['pk']).exists():
+            raise Http404('Новость не найдена.')
+        return self.kwargs['pk']
+
+    def get_cursor(self):
+        return self.request.GET.get('cursor')
+
+
+class NewsSearch(generic.ListView):
+    """Поиск по новостям и комментариям."""
+    template_name = 'news/search.html'
+
+    def get_queryset(self):
+        self.query = self.request.GET.get('q', '').strip()
+        try:
+            page_number = int(self.request.GET.get('page', 1))
+        except ValueError:
+            raise Http404('Некорректный номер страницы.')
+        per_page = settings.SEARCH_RESULTS_ON_PAGE
+        if not 1 <= page_number <= last_page(per_page):
+            raise Http404('Некорректный номер страницы.')
+        self.page = search(self.query, page_number, per_page)
+        return self.page.object_list
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.query
+        context['page'] = self.page
+        return context
 
 
 class CommentBase(LoginRequiredMixin):
@@ -83,14 +161,20 @@ class CommentBase(LoginRequiredMixin):
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
+        """Комментарий уже загружен, для адреса хватает его news_id."""
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': self.object.news_id}
         ) + '#comments'
 
     def get_queryset(self):
-        """Пользователь может работать только со своими комментариями."""
-        return self.model.objects.filter(author=self.request.user)
+        """Пользователь может работать только со своими комментариями.
+
+        Новость нужна шаблонам редактирования и удаления, поэтому
+        загружается тем же запросом.
+        """
+        return self.model.objects.filter(
+            author=self.request.user
+        ).select_related('news')
 
 
 class CommentUpdate(CommentBase, generic.UpdateView):
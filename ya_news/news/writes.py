@@ -0,0 +1,135 @@
+"""Запись новых комментариев.
+
+При наплыве комментариев к одной новости каждая отдельная транзакция
+на запись упирается в блокировку базы SQLite. `CommentWriteBuffer`
+собирает комментарии из параллельных запросов и сохраняет их одной
+транзакцией (group commit). Запрос ждёт фиксации своего пакета, поэтому
+ответ, как и без буфера, означает, что комментарий уже в базе.
+Включается настройкой COMMENT_WRITE_BUFFER.
+
+Буфер свой у каждого процесса и собирает только комментарии его
+потоков: с синхронными воркерами по одному потоку (gunicorn sync)
+пакеты не собираются, а каждый комментарий лишь ждёт лишние
+COMMENT_WRITE_DELAY секунд. Одиночный комментарий ждёт их всегда,
+поэтому буфер стоит включать только для многопоточных серверов
+под наплывом записей.
+"""
+import threading
+from concurrent.futures import Future, TimeoutError
+
+from django.conf import settings
+from django.db import transaction
+
+
+def write_comments(comments):
+    """Сохраняет комментарии одной транзакцией.
+
+    Комментарии сохраняются по одному, а не через bulk_create: в SQLite
+    он не возвращает id, а они нужны поисковому индексу и сигналам.
+    Дорога фиксация транзакции, а не отдельная вставка.
+    """
+    with transaction.atomic():
+        for comment in comments:
+            comment.save()
+
+
+class CommentWriteBuffer:
+    """
+    Пакетная запись комментариев без фонового потока.
+
+    Первый запрос, заставший буфер пустым, становится ведущим: ждёт
+    до `max_delay` секунд или пока не наберётся `max_batch` комментариев,
+    забирает накопленные комментарии и записывает их в своём соединении
+    с базой, не больше `max_batch` за транзакцию. Остальные запросы ждут
+    результата. Если пакет не записался, комментарии сохраняются
+    по одному, чтобы ошибка одного не отменила остальные.
+
+    Запрос, чей комментарий ведущий не забрал за `timeout` секунд,
+    забирает его из буфера и сохраняет сам.
+    """
+
+    def __init__(self, max_batch, max_delay, timeout=None):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.timeout = timeout if timeout is not None else max_delay * 10
+        self.condition = threading.Condition()
+        self.pending = []
+
+    def save(self, comment):
+        future = Future()
+        with self.condition:
+            leader = not self.pending
+            self.pending.append((comment, future))
+            if len(self.pending) >= self.max_batch:
+                self.condition.notify_all()
+            if leader:
+                self.condition.wait_for(
+                    lambda: len(self.pending) >= self.max_batch,
+                    timeout=self.max_delay,
+                )
+                # Отменённые комментарии их запросы сохранили сами.
+                batch = [
+                    entry for entry in self.pending
+                    if entry[1].set_running_or_notify_cancel()
+                ]
+                self.pending = []
+        if leader:
+            self.write_all(batch)
+        try:
+            future.result(self.timeout)
+        except TimeoutError:
+            # Отменить можно только ещё не забранный ведущим комментарий,
+            # забранный он запишет или передаст ошибку записи.
+            with self.condition:
+                cancelled = future.cancel()
+                if cancelled:
+                    self.pending.remove((comment, future))
+            if not cancelled:
+                future.result()
+                return
+            write_comments([comment])
+
+    def write_all(self, batch):
+        """
+        Записывает комментарии пакетами по `max_batch`: пока ведущий
+        ждал блокировку, к ним могли добавиться комментарии сверх него.
+        """
+        try:
+            for start in range(0, len(batch), self.max_batch):
+                self.write(batch[start:start + self.max_batch])
+        except BaseException as error:
+            # Ожидающие запросы не должны зависнуть навсегда.
+            for comment, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            raise
+
+    @staticmethod
+    def write(batch):
+        try:
+            write_comments([comment for comment, _ in batch])
+        except Exception:
+            for comment, future in batch:
+                comment.pk = None
+                try:
+                    write_comments([comment])
+                except Exception as error:
+                    future.set_exception(error)
+                else:
+                    future.set_result(comment)
+        else:
+            for comment, future in batch:
+                future.set_result(comment)
+
+
+comment_buffer = CommentWriteBuffer(
+    settings.COMMENT_WRITE_BATCH, settings.COMMENT_WRITE_DELAY
+)
+
+
+def save_comment(comment):
+    """Сохраняет новый комментарий, через буфер, если он включён."""
+    if settings.COMMENT_WRITE_BUFFER:
+        comment_buffer.save(comment)
+    else:
+        write_comments([comment])
@@ -1,9 +1,13 @@
+import sys
 from pathlib import Path
 
 from django.urls import reverse_lazy
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Общий код проектов (пакет yacommon) лежит в корне репозитория.
+sys.path.append(str(BASE_DIR.parent))
+
 SECRET_KEY = 'django-insecure-7)dgs++2!#==aye4rd=5)c)bw0eokiyqx0hts6#t80!$c&$s+('
 
 DEBUG = True
@@ -17,10 +21,13 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'yacommon',
     'news.apps.NewsConfig',
 ]
 
 MIDDLEWARE = [
+    'yacommon.middleware.RequestTimingMiddleware',
+    'yacommon.routers.PrimaryPinMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -28,6 +35,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'yacommon.middleware.ViewTimingMiddleware',
 ]
 
 ROOT_URLCONF = 'yanews.urls'
@@ -48,6 +56,9 @@ TEMPLATES = [
     },
 ]
 
+# Компилировать шаблоны при старте процесса (см. settings_production).
+TEMPLATES_WARMUP = False
+
 WSGI_APPLICATION = 'yanews.wsgi.application'
 
 
@@ -55,9 +66,64 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Соединение переживает запрос и не открывается заново каждый раз.
+        'CONN_MAX_AGE': 60,
     }
 }
 
+# Реплики основной базы только для чтения (см. yacommon.routers).
+# Например, копия базы в соседнем файле:
+# DATABASES['replica'] = {
+#     **DATABASES['default'],
+#     'NAME': BASE_DIR / 'replica.sqlite3',
+#     'TEST': {'MIRROR': 'default'},
+# }
+# DATABASE_REPLICAS = ['replica']
+DATABASE_REPLICAS = []
+DATABASE_ROUTERS = ['yacommon.routers.PrimaryReplicaRouter']
+# Приложения, чьи модели читаются из реплик.
+DATABASE_REPLICATED_APPS = ['news']
+# Сколько секунд после изменяющего запроса браузер читает
+# из основной базы, пока реплики догоняют её.
+DATABASE_REPLICA_PIN_SECONDS = 10
+
+# Применяются к каждому новому соединению с SQLite (см. yacommon.db).
+SQLITE_PRAGMAS = {
+    # Читатели не блокируют писателя и наоборот.
+    'journal_mode': 'WAL',
+    # В режиме WAL безопасно: теряется лишь последняя транзакция
+    # при отключении питания, но не целостность базы.
+    'synchronous': 'NORMAL',
+    # Ждать освобождения блокировки до 5 секунд вместо ошибки
+    # «database is locked».
+    'busy_timeout': 5000,
+    # Чтение файла базы через отображение в память, до 256 МиБ.
+    'mmap_size': 256 * 1024 * 1024,
+    # Кеш страниц соединения: отрицательное значение задаётся в КиБ.
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+# Через кеш процессы узнают о смене версий ленты и списка запрещённых
+# слов, поэтому при нескольких процессах нужен общий кеш (Memcached,
+# Redis, файловый), а не LocMemCache.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    }
+}
+
+
+# Сессия читается из кеша и записывается и в кеш, и в базу.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# Пользователь из кеша процесса, его версия — в общем кеше
+# (см. yacommon.auth).
+AUTHENTICATION_BACKENDS = ['yacommon.auth.CachedUserBackend']
+AUTH_USER_CACHE_SECONDS = 30
 
 AUTH_PASSWORD_VALIDATORS = []
 
@@ -72,6 +138,28 @@ USE_L10N = True
 
 USE_TZ = True
 
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'yacommon.middleware': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
+# Заголовок Server-Timing с замерами SQL, view и шаблона. Он виден
+# любому клиенту, поэтому по умолчанию включён только при отладке.
+REQUEST_TIMING = DEBUG
+# Строка JSON с теми же замерами в журнал yacommon.middleware.
+REQUEST_TIMING_LOG = False
+
 STATIC_URL = '/static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -80,3 +168,34 @@ LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+
+# Сколько первых страниц ленты и на сколько секунд кешируется
+# (news.feed).
+FEED_CACHE_PAGES = 10
+FEED_CACHE_SECONDS = 60 * 60
+
+COMMENTS_COUNT_ON_PAGE = 50
+
+# То же для страниц комментариев к новости (news.thread).
+COMMENTS_CACHE_PAGES = 10
+COMMENTS_CACHE_SECONDS = 60 * 60
+
+SEARCH_RESULTS_ON_PAGE = 20
+
+# Асинхронные страницы чтения для запуска под ASGI (news.async_views)
+# и размер пула потоков, в котором они обращаются к базе.
+NEWS_ASYNC_VIEWS = False
+NEWS_ASYNC_THREADS = 8
+
+# Пакетная запись комментариев из параллельных запросов (news.writes):
+# не больше COMMENT_WRITE_BATCH за транзакцию, запрос ждёт пакет
+# не дольше COMMENT_WRITE_DELAY секунд. Пакеты собираются только
+# из потоков одного процесса, с однопоточными воркерами буфер лишь
+# задерживает каждый комментарий.
+COMMENT_WRITE_BUFFER = False
+COMMENT_WRITE_BATCH = 100
+COMMENT_WRITE_DELAY = 0.005
+
+# Файл с дополнительными запрещёнными словами, по одному в строке.
+# После правки файла выполните `python manage.py reload_bad_words`.
+BAD_WORDS_FILE = None
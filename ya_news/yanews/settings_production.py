@@ -0,0 +1,54 @@
+"""Настройки для запуска в бою.
+
+    DJANGO_SETTINGS_MODULE=yanews.settings_production
+
+Секретный ключ и разрешённые хосты задаются переменными окружения
+DJANGO_SECRET_KEY и DJANGO_ALLOWED_HOSTS (через запятую). Без ключа
+Django не запустится, без хостов отвечает 400 на любой запрос.
+"""
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, TEMPLATES
+
+DEBUG = False
+
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY', '')
+ALLOWED_HOSTS = [
+    host for host in os.environ.get('DJANGO_ALLOWED_HOSTS', '').split(',')
+    if host
+]
+
+# Замеры запросов не отдаются клиентам, журнал включается отдельно.
+REQUEST_TIMING = False
+
+# Шаблоны читаются и разбираются один раз на процесс, а при старте
+# процесса компилируются заранее (см. yacommon.warmup).
+TEMPLATES = [{
+    **TEMPLATES[0],
+    'APP_DIRS': False,
+    'OPTIONS': {
+        **TEMPLATES[0]['OPTIONS'],
+        'loaders': [(
+            'django.template.loaders.cached.Loader', [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ],
+        )],
+    },
+}]
+TEMPLATES_WARMUP = True
+
+# Версии ленты, списка запрещённых слов и сессии должны быть общими
+# для всех процессов сервера.
+# Пользователи кешируются в памяти процесса, а их версии — здесь,
+# поэтому изменение пользователя сразу действует во всех процессах.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    }
+}
@@ -0,0 +1,10 @@
+"""Бенчмарки проекта YaNote.
+
+Запускаются из директории проекта как модули, например:
+`python -m benchmarks.load`.
+"""
+import sys
+from pathlib import Path
+
+# Общий код бенчмарков (yacommon.harness) лежит в корне репозитория.
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
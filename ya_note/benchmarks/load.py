@@ -0,0 +1,123 @@
+"""Нагрузочный бенчмарк адресов YaNote.
+
+Пример запуска из директории проекта:
+
+    python -m benchmarks.load --seed --notes 20000 --users 1000 \
+        --output baseline.json
+
+Повторный прогон с `--compare baseline.json` завершится с ошибкой,
+если выросло число SQL-запросов или p95 хуже базового больше
+чем на `--tolerance`.
+"""
+import argparse
+import sys
+from http import HTTPStatus
+import uuid
+from urllib.parse import urlencode
+
+from yacommon import harness
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--database', default='bench.sqlite3')
+    parser.add_argument('--seed', action='store_true',
+                        help='Наполнить базу перед замерами.')
+    parser.add_argument('--users', type=int, default=50_000)
+    parser.add_argument('--notes', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=200,
+                        help='Запросов на каждый сценарий.')
+    parser.add_argument('--output', help='Куда сохранить результаты.')
+    parser.add_argument('--compare', help='Базовый прогон для сравнения.')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    return parser.parse_args()
+
+
+def scenarios():
+    """Сценарии: имя, функция, выполняющая один запрос,
+    и ожидаемый код ответа.
+    """
+    from django.db.models import Count
+    from django.test import Client
+    from django.urls import reverse
+
+    from notes.models import Note
+
+    # Автор с наибольшим числом заметок — худший случай для списка.
+    author_id = Note.objects.values('author').annotate(
+        count=Count('pk')
+    ).order_by('-count').values_list('author', flat=True)[0]
+    note = Note.objects.filter(author_id=author_id).first()
+    anonymous = Client(HTTP_HOST=harness.HOST)
+    author = Client(HTTP_HOST=harness.HOST)
+    author.force_login(note.author)
+    wsgi_anonymous = harness.WSGIClient()
+    wsgi_author = harness.WSGIClient(author.cookies)
+
+    anonymous_urls = {
+        'home': reverse('notes:home'),
+        'login': reverse('users:login'),
+    }
+    author_urls = {
+        'list': reverse('notes:list'),
+        'detail': reverse('notes:detail', args=(note.slug,)),
+        'edit': reverse('notes:edit', args=(note.slug,)),
+        'delete': reverse('notes:delete', args=(note.slug,)),
+        'add': reverse('notes:add'),
+        'success': reverse('notes:success'),
+        'search': reverse('notes:search') + '?' + urlencode(
+            {'q': 'рецепт пирога'}
+        ),
+    }
+    for urls, client, wsgi in (
+        (anonymous_urls, anonymous, wsgi_anonymous),
+        (author_urls, author, wsgi_author),
+    ):
+        for name, url in urls.items():
+            yield (
+                f'client GET {name}', lambda url=url, c=client: c.get(url),
+                HTTPStatus.OK,
+            )
+            yield (
+                f'wsgi GET {name}', lambda url=url, w=wsgi: w.get(url),
+                HTTPStatus.OK,
+            )
+    # Явный slug: каждая заметка уникальна и между прогонами на одной базе.
+    yield (
+        'client POST add',
+        lambda: author.post(author_urls['add'], {
+            'title': 'Заметка из бенчмарка',
+            'text': 'Текст',
+            'slug': f'bench-{uuid.uuid4().hex}',
+        }),
+        HTTPStatus.FOUND,
+    )
+
+
+def main():
+    args = parse_args()
+    harness.setup_django('yanote.settings', args.database)
+    if args.seed:
+        from benchmarks.seed import seed
+
+        seed(users=args.users, notes=args.notes)
+    results = {
+        name: harness.measure(request, args.repeat, status)
+        for name, request, status in scenarios()
+    }
+    harness.report(results)
+    if args.output:
+        harness.save_baseline(args.output, results, {
+            'users': args.users,
+            'notes': args.notes,
+        })
+    if args.compare:
+        regressions = harness.compare(args.compare, results, args.tolerance)
+        for regression in regressions:
+            print(f'Регрессия: {regression}', file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
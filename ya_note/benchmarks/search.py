@@ -0,0 +1,76 @@
+"""Поиск по заметкам: индекс FTS5 против icontains.
+
+Ищет по заметкам автора с наибольшим их числом и по всем заметкам
+сразу, чтобы показать цену полного просмотра таблицы. icontains
+останавливается на первых подходящих строках без сортировки, а FTS5
+ранжирует все совпадения автора, поэтому частые слова ему дороже:
+время растёт с числом заметок автора, а не всей таблицы.
+
+    python -m benchmarks.search --seed --notes 1000000 --users 1000
+"""
+import argparse
+
+from yacommon import harness
+
+QUERIES = ('молоко', 'рецепт пирога', 'отч', 'слово5000', 'несуществующее')
+LIMIT = 50
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--database', default='bench.sqlite3')
+    parser.add_argument('--seed', action='store_true',
+                        help='Наполнить базу перед замерами.')
+    parser.add_argument('--users', type=int, default=1_000)
+    parser.add_argument('--notes', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    return parser.parse_args()
+
+
+def scenarios():
+    from django.db.models import Count, Q
+
+    from notes.models import Note
+    from notes.search import get_terms, search_notes
+
+    author_id = Note.objects.values('author').annotate(
+        count=Count('pk')
+    ).order_by('-count').values_list('author', flat=True)[0]
+    author = Note.objects.filter(author_id=author_id).first().author
+
+    def icontains(query, **filters):
+        condition = Q()
+        for term in get_terms(query):
+            condition &= Q(title__icontains=term) | Q(text__icontains=term)
+        return list(
+            Note.objects.filter(condition, **filters)
+            .only('id', 'slug', 'title')[:LIMIT]
+        )
+
+    for query in QUERIES:
+        yield f'fts5 "{query}"', lambda query=query: search_notes(
+            author, query, LIMIT
+        )
+        yield f'icontains автор "{query}"', lambda query=query: icontains(
+            query, author=author
+        )
+        yield f'icontains все "{query}"', lambda query=query: icontains(
+            query
+        )
+
+
+def main():
+    args = parse_args()
+    harness.setup_django('yanote.settings', args.database)
+    if args.seed:
+        from benchmarks.seed import seed
+
+        seed(users=args.users, notes=args.notes)
+    harness.report({
+        name: harness.measure(search, args.repeat, status=None)
+        for name, search in scenarios()
+    })
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Наполнение базы для бенчмарков через пакетный bulk_create."""
+import random
+from itertools import accumulate, islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from notes.models import Note
+
+User = get_user_model()
+
+BATCH_SIZE = 5000
+PASSWORD = 'benchmark'
+# Словарь текстов заметок: частые слова и длинный хвост редких,
+# частоты убывают по закону Ципфа, как в обычных текстах.
+WORDS = (
+    'список', 'покупок', 'встреча', 'планы', 'на', 'неделю', 'идеи',
+    'проекта', 'заметки', 'к', 'отпуску', 'рецепт', 'пирога', 'задачи',
+    'отчёт', 'за', 'месяц', 'книги', 'прочитать', 'тренировка', 'молоко',
+    'хлеб', 'звонок', 'врачу', 'подарок', 'маме', 'билеты', 'поезд',
+) + tuple(f'слово{index}' for index in range(20_000))
+CUM_WEIGHTS = list(accumulate(1 / rank for rank in range(1, len(WORDS) + 1)))
+
+
+def batched(objects, size):
+    """bulk_create превращает аргумент в список, поэтому режем сами."""
+    objects = iter(objects)
+    while batch := list(islice(objects, size)):
+        yield batch
+
+
+def bulk_insert(model, objects, batch_size=BATCH_SIZE):
+    for batch in batched(objects, batch_size):
+        with transaction.atomic():
+            model.objects.bulk_create(batch)
+
+
+def seed(users, notes, seed=0):
+    """Создаёт пользователей и их заметки."""
+    rng = random.Random(seed)
+    password = make_password(PASSWORD)
+    bulk_insert(User, (
+        User(username=f'bench-user-{index}', password=password)
+        for index in range(users)
+    ))
+    user_ids = list(User.objects.values_list('id', flat=True))
+    # bulk_create не вызывает Note.save, поэтому slug задаётся явно.
+    bulk_insert(Note, (
+        Note(
+            title=f'Заметка {index}',
+            text=' '.join(rng.choices(
+                WORDS, cum_weights=CUM_WEIGHTS, k=rng.randint(10, 400)
+            )),
+            slug=f'bench-note-{index}',
+            author_id=rng.choice(user_ids),
+        )
+        for index in range(notes)
+    ))
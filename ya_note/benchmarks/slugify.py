@@ -0,0 +1,45 @@
+"""Транслитерация заголовков при массовом импорте заметок.
+
+Сравнивает прямой вызов `pytils.translit.slugify` с `slugify_title`,
+который запоминает результаты в LRU-кеше.
+
+    python -m benchmarks.slugify
+"""
+import random
+import timeit
+
+from pytils.translit import slugify
+
+from notes.slugs import slugify_title
+
+WORDS = (
+    'список', 'покупок', 'встреча', 'планы', 'на', 'неделю', 'идеи',
+    'проекта', 'заметки', 'к', 'отпуску', 'рецепт', 'пирога', 'задачи',
+    'отчёт', 'за', 'месяц', 'книги', 'прочитать', 'тренировка',
+)
+TITLES = 100_000
+# Число различных заголовков среди импортируемых.
+DISTINCT_TITLES = (1_000, 10_000, 100_000)
+
+
+def main():
+    rng = random.Random(0)
+    print(f'{"различных":>10} {"pytils, с":>10} {"LRU, с":>10}')
+    for distinct in DISTINCT_TITLES:
+        pool = [
+            ' '.join(rng.choices(WORDS, k=rng.randint(2, 6)))
+            for _ in range(distinct)
+        ]
+        titles = rng.choices(pool, k=TITLES)
+        slugify_title.cache_clear()
+        plain = timeit.timeit(
+            lambda: [slugify(title) for title in titles], number=1
+        )
+        cached = timeit.timeit(
+            lambda: [slugify_title(title) for title in titles], number=1
+        )
+        print(f'{distinct:>10} {plain:>10.2f} {cached:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+from yacommon.db import configure_sqlite
 
 
 class NotesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'notes'
+
+    def ready(self):
+        connection_created.connect(
+            configure_sqlite, dispatch_uid='notes.configure_sqlite'
+        )
@@ -0,0 +1,11 @@
+from notes.models import Note
+from yacommon.transfer import ExportCommand
+
+KINDS = {
+    'notes': (Note, ('id', 'title', 'text', 'slug', 'author_id')),
+}
+
+
+class Command(ExportCommand):
+    help = 'Выгружает заметки в JSONL или CSV; «-» вместо файла — stdout.'
+    kinds = KINDS
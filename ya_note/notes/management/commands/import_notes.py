@@ -0,0 +1,42 @@
+from collections import Counter
+
+from django.core.management.base import CommandError
+
+from notes.forms import WARNING
+from notes.management.commands.export_notes import KINDS
+from notes.models import Note
+from notes.slugs import allocate_slugs, slugify_title
+from yacommon.transfer import ImportCommand
+
+
+class Command(ImportCommand):
+    help = 'Загружает заметки из JSONL или CSV в формате export_notes.'
+    kinds = KINDS
+
+    def import_batch(self, model, records):
+        """
+        slug проверяются по правилам NoteForm: явно указанный должен
+        быть свободен, пустой строится из заголовка. bulk_create не
+        вызывает Note.save, поэтому slug выделяются здесь на весь пакет.
+        Поисковый индекс обновляют триггеры базы.
+        """
+        notes = [Note(**record) for record in records]
+        explicit = [note.slug for note in notes if note.slug]
+        duplicates = {
+            slug for slug, count in Counter(explicit).items() if count > 1
+        }
+        duplicates.update(Note.objects.filter(
+            slug__in=explicit
+        ).values_list('slug', flat=True))
+        if duplicates:
+            raise CommandError(', '.join(sorted(duplicates)) + WARNING)
+        generated = [note for note in notes if not note.slug]
+        slugs = allocate_slugs(
+            Note.objects.all(),
+            [slugify_title(note.title) for note in generated],
+            Note._meta.get_field('slug').max_length,
+            reserved=explicit,
+        )
+        for note, slug in zip(generated, slugs):
+            note.slug = slug
+        Note.objects.bulk_create(notes)
@@ -1,7 +1,11 @@
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, transaction
 
-from pytils.translit import slugify
+from .slugs import allocate_slug, slugify_title
+
+# Сколько раз пробовать сохранить заметку с новым slug, если его
+# успел занять параллельный запрос.
+SLUG_ATTEMPTS = 5
 
 
 class Note(models.Model):
@@ -28,11 +32,31 @@ class Note(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('author', 'slug'), name='note_author_slug_idx'
+            ),
+        )
+
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        """Если slug не задан, он строится из заголовка и делается
+        уникальным суффиксом -2, -3 и т.д.
+        """
+        if self.slug:
+            return super().save(*args, **kwargs)
+        max_slug_length = self._meta.get_field('slug').max_length
+        base = slugify_title(self.title)
+        others = Note.objects.exclude(pk=self.pk)
+        for attempt in range(1, SLUG_ATTEMPTS + 1):
+            self.slug = allocate_slug(others, base, max_slug_length)
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                if attempt == SLUG_ATTEMPTS:
+                    self.slug = ''
+                    raise
@@ -0,0 +1,77 @@
+"""Полнотекстовый поиск по заметкам."""
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import Note
+
+FTS_TABLE = 'notes_note_fts'
+# Длинные запросы обрезаются: каждое слово — отдельный обход индекса.
+MAX_TERMS = 8
+TERM = re.compile(r'\w+')
+# Совпадает с prefix в 0003_note_fts: такие префиксы есть в индексе
+# готовыми списками. Префиксы длиннее пришлось бы собирать из всех
+# подходящих слов всех авторов, поэтому длинные слова ищутся целиком.
+PREFIX_LENGTH = 3
+
+SEARCH_SQL = f"""
+    SELECT notes_note.id, notes_note.title, notes_note.slug
+    FROM {FTS_TABLE}
+    JOIN notes_note ON notes_note.id = {FTS_TABLE}.rowid
+    WHERE {FTS_TABLE} MATCH %s
+    ORDER BY {FTS_TABLE}.rank
+    LIMIT %s
+"""
+
+
+def get_terms(query):
+    """Слова запроса в нижнем регистре без повторов."""
+    terms = dict.fromkeys(TERM.findall(query.lower()))
+    return list(terms)[:MAX_TERMS]
+
+
+def build_match(author_id, terms):
+    """
+    Выражение MATCH: все слова в заголовке или тексте
+    и id автора в отдельной колонке индекса.
+    """
+    words = ' '.join(
+        f'"{term}"*' if len(term) <= PREFIX_LENGTH else f'"{term}"'
+        for term in terms
+    )
+    return f'author_id:"{author_id}" AND {{title text}}:({words})'
+
+
+def search_notes(author, query, limit):
+    """
+    Заметки автора, подходящие под запрос, от самых релевантных.
+
+    На SQLite запрос идёт в FTS5-индекс, заголовок весит больше текста.
+    На других СУБД — простой icontains по заголовку и тексту.
+    """
+    terms = get_terms(query)
+    if not terms:
+        return []
+    if connection.vendor == 'sqlite':
+        return list(Note.objects.raw(
+            SEARCH_SQL, [build_match(author.pk, terms), limit]
+        ))
+    condition = Q()
+    for term in terms:
+        condition &= Q(title__icontains=term) | Q(text__icontains=term)
+    return list(
+        Note.objects.filter(condition, author=author)
+        .only('id', 'slug', 'title').order_by('pk')[:limit]
+    )
+
+
+def rebuild_index():
+    """Перестраивает индекс по содержимому таблицы заметок."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+        )
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')"
+        )
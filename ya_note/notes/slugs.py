@@ -0,0 +1,92 @@
+"""Выделение уникальных slug для заметок."""
+from functools import lru_cache
+
+from django.db.models import Q
+from pytils.translit import slugify
+
+SEPARATOR = '-'
+# Сколько последних заголовков помнит slugify_title.
+SLUGIFY_CACHE_SIZE = 4096
+# Место под суффикс «-N», если slug упирается в максимальную длину.
+MAX_SUFFIX_LENGTH = 8
+
+
+@lru_cache(maxsize=SLUGIFY_CACHE_SIZE)
+def slugify_title(title):
+    """Транслитерирует заголовок в slug, запоминая результат.
+
+    Транслитерация pytils дорогая, а заголовки часто повторяются,
+    особенно при массовом импорте.
+    """
+    return slugify(title)
+
+
+def find_taken(queryset, base, max_length):
+    """Основа для суффикса и все занятые slug вида `base` и `base-N`.
+
+    Выбираются одним запросом по диапазону уникального индекса slug.
+    """
+    stem = base[:max_length - MAX_SUFFIX_LENGTH] + SEPARATOR
+    # Все строки с префиксом stem лежат в диапазоне [stem, stem + 1),
+    # где последний символ увеличен на единицу.
+    stem_end = stem[:-1] + chr(ord(SEPARATOR) + 1)
+    taken = set(queryset.filter(
+        Q(slug=base) | Q(slug__gte=stem, slug__lt=stem_end)
+    ).values_list('slug', flat=True))
+    return stem, taken
+
+
+def next_number(stem, taken):
+    """Номер на единицу больше наибольшего занятого."""
+    numbers = [
+        int(slug[len(stem):]) for slug in taken
+        if slug.startswith(stem) and slug[len(stem):].isdigit()
+    ]
+    return max(numbers, default=1) + 1
+
+
+def allocate_slug(queryset, base, max_length):
+    """Возвращает свободный slug: `base`, иначе `base-N`.
+
+    N берётся на единицу больше наибольшего занятого. Свободный
+    сейчас slug может занять параллельный запрос, поэтому вызывающий
+    код должен повторить попытку при IntegrityError.
+    """
+    base = base[:max_length]
+    stem, taken = find_taken(queryset, base, max_length)
+    if base not in taken:
+        return base
+    return f'{stem}{next_number(stem, taken)}'
+
+
+def allocate_slugs(queryset, bases, max_length, reserved=()):
+    """Свободные slug для пачки заметок по тем же правилам.
+
+    Свободные базы находятся одним запросом на всю пачку; варианты
+    `base-N` запрашиваются только для занятых баз, повторы внутри
+    пачки получают следующие номера. `reserved` — slug, которые
+    пачка уже заняла явно.
+    """
+    bases = [base[:max_length] for base in bases]
+    taken = set(reserved)
+    taken.update(queryset.filter(
+        slug__in=set(bases)
+    ).values_list('slug', flat=True))
+    stems = {}
+    numbers = {}
+    slugs = []
+    for base in bases:
+        slug = base
+        if slug in taken:
+            if base not in stems:
+                stems[base], found = find_taken(queryset, base, max_length)
+                taken |= found
+            stem = stems[base]
+            number = numbers.get(base) or next_number(stem, taken)
+            while f'{stem}{number}' in taken:
+                number += 1
+            slug = f'{stem}{number}'
+            numbers[base] = number + 1
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
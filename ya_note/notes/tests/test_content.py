@@ -1,8 +1,16 @@
+from http import HTTPStatus
+from io import StringIO
+from unittest import mock
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.management import call_command
+from django.template.loaders.filesystem import Loader
+from django.test import TestCase, override_settings
 from django.urls import reverse
 
 from notes.models import Note
+from yacommon import auth
+from yanote import settings_production
 
 User = get_user_model()
 
@@ -37,6 +45,55 @@ class TestContent(TestCase):
                 object_list = response.context['object_list']
                 check(self.note, object_list)
 
+    @override_settings(NOTES_COUNT_ON_PAGE=2)
+    def test_notes_list_pagination(self):
+        """Список заметок выводится постранично, без текста заметок."""
+        notes = [self.note] + [
+            Note.objects.create(
+                title=f'Заметка {index}', text='Текст', author=self.user
+            )
+            for index in range(2)
+        ]
+        list_url = reverse('notes:list')
+        self.client.force_login(self.user)
+        response = self.client.get(list_url)
+        first_page = response.context['object_list']
+        self.assertEqual(first_page, notes[:2])
+        self.assertIn('text', first_page[0].get_deferred_fields())
+        response = self.client.get(
+            list_url, {'after': response.context['next_after']}
+        )
+        self.assertEqual(response.context['object_list'], notes[2:])
+        self.assertIsNone(response.context['next_after'])
+        for after in ('not-a-number', str(10 ** 30)):
+            with self.subTest(after=after):
+                response = self.client.get(list_url, {'after': after})
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_search_notes(self):
+        """Поиск находит только заметки автора, совпадения в заголовке
+        выше совпадений в тексте, индекс следит за изменениями.
+        """
+        in_text = Note.objects.create(
+            title='Покупки', text='Купить молоко', author=self.user
+        )
+        in_title = Note.objects.create(
+            title='Молоко', text='Текст', author=self.user
+        )
+        Note.objects.create(
+            title='Молоко', text='Текст', author=self.anoter_user
+        )
+        search_url = reverse('notes:search')
+        self.client.force_login(self.user)
+        response = self.client.get(search_url, {'q': 'МОЛОКО'})
+        self.assertEqual(
+            list(response.context['object_list']), [in_title, in_text]
+        )
+        in_text.text = 'Купить хлеб'
+        in_text.save()
+        response = self.client.get(search_url, {'q': 'молоко'})
+        self.assertEqual(list(response.context['object_list']), [in_title])
+
     def test_pages_contain_form(self):
         """Проверка наличия форм на страницах
         создания и редактирования заметки.
@@ -48,3 +105,33 @@ class TestContent(TestCase):
             with self.subTest(url=url):
                 response = self.client.get(url)
                 self.assertIn('form', response.context)
+
+    def test_user_is_cached_until_changed(self):
+        """Сессия и пользователь берутся из кеша, пока пользователя
+        не изменят: на странице списка остаётся один запрос заметок.
+        """
+        # Откат транзакции теста не сбрасывает кеш процесса.
+        self.addCleanup(auth.users.clear)
+        list_url = reverse('notes:list')
+        self.client.force_login(self.user)
+        self.client.get(list_url)
+        with self.assertNumQueries(1):
+            self.client.get(list_url)
+        self.user.username = 'Новое имя'
+        self.user.save()
+        self.assertContains(self.client.get(list_url), 'Новое имя')
+
+    @override_settings(TEMPLATES=settings_production.TEMPLATES)
+    def test_templates_are_warmed_up(self):
+        """После warm_templates заметка отрисовывается
+        без чтения файлов шаблонов.
+        """
+        call_command('warm_templates', stdout=StringIO())
+        self.client.force_login(self.user)
+        with mock.patch.object(
+            Loader, 'get_contents', side_effect=AssertionError
+        ):
+            response = self.client.get(
+                reverse('notes:detail', args=(self.note.slug,))
+            )
+        self.assertContains(response, self.note.text)
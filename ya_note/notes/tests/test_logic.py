@@ -1,12 +1,20 @@
+import json
+import tempfile
 from http import HTTPStatus
+from pathlib import Path
+from unittest import mock
 from pytils.translit import slugify
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.test import TestCase, override_settings
 from django.urls import reverse
 
 from notes.forms import WARNING
 from notes.models import Note
+from notes.search import search_notes
+from yacommon.routers import PIN_COOKIE
 
 User = get_user_model()
 
@@ -85,6 +93,35 @@ class TestLogic(TestCase):
         expected_slug = slugify(self.form_data['title'])
         self.assertEqual(new_note.slug, expected_slug)
 
+    def test_empty_slug_is_made_unique(self):
+        """Если slug из заголовка занят, к нему добавляется суффикс."""
+        add_url = reverse('notes:add')
+        self.client.force_login(self.user)
+        data = {'title': self.form_data['title'], 'text': 'Текст'}
+        for _ in range(3):
+            self.client.post(add_url, data=data)
+        base_slug = slugify(self.form_data['title'])
+        slugs = set(Note.objects.filter(
+            title=self.form_data['title']
+        ).exclude(pk=self.note.pk).values_list('slug', flat=True))
+        self.assertEqual(
+            slugs, {base_slug, f'{base_slug}-2', f'{base_slug}-3'}
+        )
+
+    def test_slug_conflict_is_retried(self):
+        """Если slug заняли между выбором и сохранением,
+        заметка сохраняется со следующим свободным slug.
+        """
+        new_note = Note(title='Пятница', text='Текст', author=self.user)
+        with mock.patch(
+            'notes.models.allocate_slug',
+            side_effect=(self.note.slug, 'friday-2')
+        ) as allocate_slug:
+            new_note.save()
+        self.assertEqual(allocate_slug.call_count, 2)
+        new_note.refresh_from_db()
+        self.assertEqual(new_note.slug, 'friday-2')
+
     def test_user_can_edit_note(self):
         """Автор заметки может её отредактировать."""
         edit_url = reverse('notes:edit', args=(self.note.slug,))
@@ -120,3 +157,109 @@ class TestLogic(TestCase):
         response = self.client.post(delete_url)
         self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
         self.assertEqual(Note.objects.count(), self.db_obj_default)
+
+    def test_rebuild_notes_search(self):
+        """Команда восстанавливает очищенный поисковый индекс."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO notes_note_fts(notes_note_fts) "
+                "VALUES ('delete-all')"
+            )
+        self.assertEqual(search_notes(self.user, 'пятница', 10), [])
+        call_command('rebuild_notes_search', stdout=mock.Mock())
+        self.assertEqual(search_notes(self.user, 'пятница', 10), [self.note])
+
+    def import_notes(self, *records):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'notes.jsonl'
+            path.write_text(''.join(
+                json.dumps(dict(record, author_id=self.user.pk)) + '\n'
+                for record in records
+            ), encoding='utf-8')
+            call_command('import_notes', path, stdout=mock.Mock())
+
+    def test_import_notes_makes_slugs_unique(self):
+        """Пустые slug при импорте строятся из заголовка
+        и не совпадают ни с базой, ни с другими заметками пакета.
+        """
+        base = slugify(self.form_data['title'])
+        title = {'title': self.form_data['title'], 'text': 'Текст'}
+        self.import_notes(
+            title, title, dict(title, slug=f'{base}-2'), title
+        )
+        self.assertEqual(set(Note.objects.exclude(
+            pk=self.note.pk
+        ).values_list('slug', flat=True)), {
+            base, f'{base}-2', f'{base}-3', f'{base}-4'
+        })
+
+    def test_import_notes_rejects_taken_slug(self):
+        """Занятый slug отклоняется, как в форме заметки."""
+        with self.assertRaisesMessage(CommandError, WARNING):
+            self.import_notes(
+                {'title': 'Новая', 'text': 'Текст', 'slug': self.note.slug}
+            )
+        self.assertEqual(Note.objects.count(), self.db_obj_default)
+
+    def test_export_and_import_notes(self):
+        """Выгруженные заметки загружаются обратно без изменений."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'notes.csv'
+            call_command('export_notes', path, stderr=mock.Mock())
+            Note.objects.all().delete()
+            call_command('import_notes', path, stdout=mock.Mock())
+        note = Note.objects.get()
+        self.assertEqual(note.pk, self.note.pk)
+        self.check_note(note, self.form_data)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class TestReplicaRouting(TestCase):
+    """Чтение заметок из реплики — отдельного файла SQLite."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        connections.databases['replica'] = {
+            **connections.databases['default'],
+            'NAME': str(Path(directory.name) / 'replica.sqlite3'),
+            'TEST': {},
+        }
+        self.addCleanup(self.remove_replica)
+        call_command('migrate', database='replica', verbosity=0)
+        self.user = User.objects.create(username='Valera')
+        self.note = Note.objects.create(
+            title='Из основной базы', text='Текст', slug='primary',
+            author=self.user,
+        )
+        User.objects.using('replica').create(
+            pk=self.user.pk, username=self.user.username
+        )
+        Note.objects.using('replica').create(
+            title='Из реплики', text='Текст', slug='replica',
+            author_id=self.user.pk,
+        )
+        self.client.force_login(self.user)
+
+    @staticmethod
+    def remove_replica():
+        connections['replica'].close()
+        del connections['replica']
+        del connections.databases['replica']
+
+    def test_reads_go_to_replica_until_write(self):
+        """Список заметок читается из реплики, а после изменения —
+        из основной базы, где изменение уже видно.
+        """
+        list_url = reverse('notes:list')
+        self.assertContains(self.client.get(list_url), 'Из реплики')
+        response = self.client.post(reverse('notes:add'), data={
+            'title': 'Новая', 'text': 'Текст', 'slug': 'new'
+        })
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.assertFalse(Note.objects.using('replica').filter(
+            slug='new'
+        ).exists())
+        response = self.client.get(list_url)
+        self.assertContains(response, 'Новая')
+        self.assertNotContains(response, 'Из реплики')
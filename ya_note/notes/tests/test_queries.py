@@ -0,0 +1,96 @@
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from notes.models import Note
+
+User = get_user_model()
+
+
+class TestQueryPlans(TestCase):
+    """Проверка планов выполнения запросов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='Valera')
+        cls.note = Note.objects.create(
+            title='Заголовок',
+            text='Текст',
+            slug='the_slug',
+            author=cls.user
+        )
+
+    def query_plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertNoFullScans(self, url):
+        """Ни один запрос страницы не читает таблицу целиком
+        и не сортирует строки во временном B-дереве.
+        """
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+        for query in context.captured_queries:
+            for step in self.query_plan(query['sql']):
+                with self.subTest(sql=query['sql'], step=step):
+                    self.assertFalse(
+                        step.startswith('SCAN ') and 'USING' not in step
+                    )
+                    self.assertNotIn('TEMP B-TREE', step)
+
+    def test_pages_use_indexes(self):
+        """Список заметок и заметка выбираются по индексам."""
+        urls = (
+            reverse('notes:list'),
+            reverse('notes:list') + f'?after={self.note.pk}',
+            reverse('notes:detail', args=(self.note.slug,)),
+        )
+        self.client.force_login(self.user)
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertNoFullScans(url)
+
+
+class TestConnectionSettings(TestCase):
+    """Проверка настроек соединения с базой данных."""
+
+    def test_sqlite_pragmas(self):
+        """Соединение настроено согласно settings.SQLITE_PRAGMAS."""
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            busy_timeout, = cursor.fetchone()
+            cursor.execute('PRAGMA temp_store')
+            temp_store, = cursor.fetchone()
+        self.assertEqual(
+            busy_timeout, settings.SQLITE_PRAGMAS['busy_timeout']
+        )
+        # 2 — MEMORY.
+        self.assertEqual(temp_store, 2)
+
+
+class TestRequestTiming(TestCase):
+    """Проверка замеров запросов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='Valera')
+
+    @override_settings(REQUEST_TIMING=True, REQUEST_TIMING_LOG=True)
+    def test_server_timing_header(self):
+        """Замеры запроса попадают в заголовок Server-Timing и журнал."""
+        self.client.force_login(self.user)
+        with self.assertLogs('yacommon.middleware', level='INFO') as logs:
+            response = self.client.get(reverse('notes:list'))
+        for metric in ('db;dur=', 'queries', 'view;dur=', 'render;dur='):
+            with self.subTest(metric=metric):
+                self.assertIn(metric, response['Server-Timing'])
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(record['path'], reverse('notes:list'))
+        self.assertEqual(record['status'], 200)
+        self.assertGreater(record['queries'], 0)
@@ -41,6 +41,7 @@ class TestRoutes(TestCase):
             '/',
             '/add/',
             '/notes/',
+            '/search/',
             '/done/',
             '/auth/login/',
             '/auth/logout/',
@@ -78,6 +79,7 @@ class TestRoutes(TestCase):
             (f'/note/{self.note.slug}/'),
             (f'/delete/{self.note.slug}/'),
             '/notes/',
+            '/search/',
             '/done/'
         )
         login_url = '/auth/login/'
@@ -1,9 +1,16 @@
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import IntegrityError, transaction
+from django.http import Http404
 from django.urls import reverse_lazy
 from django.views import generic
 
-from .forms import NoteForm
+from .forms import NoteForm, WARNING
 from .models import Note
+from .search import search_notes
+
+# Наибольшее целое, которое SQLite принимает в параметре запроса.
+MAX_ID = 2 ** 63 - 1
 
 
 class Home(generic.TemplateView):
@@ -26,22 +33,33 @@ class NoteBase(LoginRequiredMixin):
         return self.model.objects.filter(author=self.request.user)
 
 
-class NoteCreate(NoteBase, generic.CreateView):
-    """Добавление заметки."""
+class NoteFormBase(NoteBase):
+    """Базовый класс для создания и редактирования заметки."""
     template_name = 'notes/form.html'
     form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
+        """Указанный slug мог занять параллельный запрос
+        между проверкой формы и сохранением.
+        """
+        try:
+            with transaction.atomic():
+                return super().form_valid(form)
+        except IntegrityError:
+            form.add_error('slug', form.instance.slug + WARNING)
+            return self.form_invalid(form)
+
+
+class NoteCreate(NoteFormBase, generic.CreateView):
+    """Добавление заметки."""
+
+    def form_valid(self, form):
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
-class NoteUpdate(NoteBase, generic.UpdateView):
+class NoteUpdate(NoteFormBase, generic.UpdateView):
     """Редактирование заметки."""
-    template_name = 'notes/form.html'
-    form_class = NoteForm
 
 
 class NoteDelete(NoteBase, generic.DeleteView):
@@ -53,6 +71,55 @@ class NotesList(NoteBase, generic.ListView):
     """Список всех заметок пользователя."""
     template_name = 'notes/list.html'
 
+    def get_queryset(self):
+        """
+        Выводим заметки постранично в порядке создания.
+
+        Следующая страница начинается после id из параметра `after`,
+        поэтому запрос идёт по индексу author_id (SQLite хранит в нём
+        и id) и не зависит от номера страницы. Загружаются только
+        нужные списку поля.
+        """
+        queryset = super().get_queryset().only(
+            'id', 'slug', 'title'
+        ).order_by('pk')
+        after = self.request.GET.get('after')
+        if after:
+            try:
+                after = int(after)
+                if not -MAX_ID <= after <= MAX_ID:
+                    raise ValueError(after)
+            except ValueError:
+                raise Http404('Некорректный параметр after.')
+            queryset = queryset.filter(pk__gt=after)
+        notes = list(queryset[:settings.NOTES_COUNT_ON_PAGE + 1])
+        self.next_after = None
+        if len(notes) > settings.NOTES_COUNT_ON_PAGE:
+            notes = notes[:settings.NOTES_COUNT_ON_PAGE]
+            self.next_after = notes[-1].pk
+        return notes
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['next_after'] = self.next_after
+        return context
+
+
+class NoteSearch(LoginRequiredMixin, generic.ListView):
+    """Поиск по заметкам пользователя."""
+    template_name = 'notes/search.html'
+
+    def get_queryset(self):
+        self.query = self.request.GET.get('q', '').strip()
+        return search_notes(
+            self.request.user, self.query, settings.NOTES_COUNT_ON_PAGE
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.query
+        return context
+
 
 class NoteDetail(NoteBase, generic.DetailView):
     """Заметка подробно."""
@@ -1,9 +1,13 @@
+import sys
 from pathlib import Path
 
 from django.urls import reverse_lazy
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Общий код проектов (пакет yacommon) лежит в корне репозитория.
+sys.path.append(str(BASE_DIR.parent))
+
 SECRET_KEY = 'django-insecure-yipnj$#j!ajarq%k55z4kuf3x79)91h0h42o9!1ho(z=!%mt=#'
 
 DEBUG = False
@@ -18,10 +22,13 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'yacommon',
     'notes.apps.NotesConfig'
 ]
 
 MIDDLEWARE = [
+    'yacommon.middleware.RequestTimingMiddleware',
+    'yacommon.routers.PrimaryPinMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -29,6 +36,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'yacommon.middleware.ViewTimingMiddleware',
 ]
 
 ROOT_URLCONF = 'yanote.urls'
@@ -49,6 +57,9 @@ TEMPLATES = [
     },
 ]
 
+# Компилировать шаблоны при старте процесса (см. settings_production).
+TEMPLATES_WARMUP = False
+
 WSGI_APPLICATION = 'yanote.wsgi.application'
 
 
@@ -56,9 +67,52 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Соединение переживает запрос и не открывается заново каждый раз.
+        'CONN_MAX_AGE': 60,
     }
 }
 
+# Реплики основной базы только для чтения (см. yacommon.routers).
+# Например, копия базы в соседнем файле:
+# DATABASES['replica'] = {
+#     **DATABASES['default'],
+#     'NAME': BASE_DIR / 'replica.sqlite3',
+#     'TEST': {'MIRROR': 'default'},
+# }
+# DATABASE_REPLICAS = ['replica']
+DATABASE_REPLICAS = []
+DATABASE_ROUTERS = ['yacommon.routers.PrimaryReplicaRouter']
+# Приложения, чьи модели читаются из реплик.
+DATABASE_REPLICATED_APPS = ['notes']
+# Сколько секунд после изменяющего запроса браузер читает
+# из основной базы, пока реплики догоняют её.
+DATABASE_REPLICA_PIN_SECONDS = 10
+
+# Применяются к каждому новому соединению с SQLite (см. yacommon.db).
+SQLITE_PRAGMAS = {
+    # Читатели не блокируют писателя и наоборот.
+    'journal_mode': 'WAL',
+    # В режиме WAL безопасно: теряется лишь последняя транзакция
+    # при отключении питания, но не целостность базы.
+    'synchronous': 'NORMAL',
+    # Ждать освобождения блокировки до 5 секунд вместо ошибки
+    # «database is locked».
+    'busy_timeout': 5000,
+    # Чтение файла базы через отображение в память, до 256 МиБ.
+    'mmap_size': 256 * 1024 * 1024,
+    # Кеш страниц соединения: отрицательное значение задаётся в КиБ.
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+
+# Сессия читается из кеша и записывается и в кеш, и в базу.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# Пользователь из кеша процесса, его версия — в общем кеше
+# (см. yacommon.auth).
+AUTHENTICATION_BACKENDS = ['yacommon.auth.CachedUserBackend']
+AUTH_USER_CACHE_SECONDS = 30
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -81,9 +135,33 @@ USE_L10N = True
 USE_TZ = True
 
 
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'yacommon.middleware': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
+# Заголовок Server-Timing с замерами SQL, view и шаблона. Он виден
+# любому клиенту, поэтому по умолчанию включён только при отладке.
+REQUEST_TIMING = DEBUG
+# Строка JSON с теми же замерами в журнал yacommon.middleware.
+REQUEST_TIMING_LOG = False
+
 STATIC_URL = '/static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+NOTES_COUNT_ON_PAGE = 50
@@ -0,0 +1,5 @@
+"""Код, общий для проектов ya_news и ya_note.
+
+Каталог репозитория добавляется в sys.path в settings.py каждого
+проекта, поэтому пакет импортируется как `yacommon`.
+"""
@@ -0,0 +1,25 @@
+from django.apps import AppConfig
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+
+
+class CommonConfig(AppConfig):
+    name = 'yacommon'
+    verbose_name = 'Общий код'
+
+    def ready(self):
+        # Приёмники подключаются в каждом процессе, а не только в тех,
+        # где уже проверяли авторизацию: иначе changepassword,
+        # createsuperuser и shell не меняли бы версию пользователя.
+        from .auth import forget_user
+        post_save.connect(
+            forget_user, sender=settings.AUTH_USER_MODEL,
+            dispatch_uid='auth.forget_user.save',
+        )
+        post_delete.connect(
+            forget_user, sender=settings.AUTH_USER_MODEL,
+            dispatch_uid='auth.forget_user.delete',
+        )
+        if settings.TEMPLATES_WARMUP:
+            from .warmup import warm_templates
+            warm_templates()
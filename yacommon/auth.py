@@ -0,0 +1,69 @@
+"""Кеш пользователей для AuthenticationMiddleware.
+
+Без него каждый запрос авторизованного пользователя загружает его
+из базы. CachedUserBackend держит загруженных пользователей в памяти
+процесса до AUTH_USER_CACHE_SECONDS секунд.
+
+Изменение или удаление пользователя сбрасывает запись в этом процессе
+сразу, а после фиксации транзакции меняет версию пользователя в общем
+кеше `default`. Приёмники сигналов подключает `yacommon.apps` в каждом
+процессе, поэтому версию меняют и команды manage.py (changepassword,
+createsuperuser, shell). Остальные процессы сверяют её при каждом запросе,
+поэтому новый пароль (сессии проверяют его хеш) и снятый is_active
+действуют сразу во всех процессах. Если кеш не общий (LocMemCache),
+другие процессы до истечения срока принимают старые сессии
+пользователя: такой кеш годится только для одного процесса. Изменения
+в обход сигналов (`QuerySet.update`) версию не меняют.
+"""
+import copy
+import time
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import transaction
+
+MAX_USERS = 10000
+VERSION_KEY = 'auth:user:{}'
+
+# id пользователя: (момент устаревания, версия, пользователь).
+users = {}
+
+
+def get_user_version(user_id):
+    return cache.get_or_set(VERSION_KEY.format(user_id), time.time_ns, None)
+
+
+def bump_user_version(user_id):
+    """Объявляет пользователя устаревшим во всех процессах."""
+    cache.set(VERSION_KEY.format(user_id), time.time_ns(), None)
+
+
+def forget_user(sender, instance, **kwargs):
+    """Приёмник post_save и post_delete модели пользователя."""
+    users.pop(instance.pk, None)
+    # Иначе другой процесс успеет прочитать ещё не изменённого
+    # пользователя и сохранить его под новой версией.
+    user_id = instance.pk
+    transaction.on_commit(lambda: bump_user_version(user_id))
+
+
+class CachedUserBackend(ModelBackend):
+
+    def get_user(self, user_id):
+        """Копия пользователя из кеша: запрос может менять свой объект."""
+        now = time.monotonic()
+        version = get_user_version(user_id)
+        cached = users.get(user_id)
+        if cached is not None and cached[0] > now and cached[1] == version:
+            return copy.deepcopy(cached[2])
+        user = super().get_user(user_id)
+        if user is not None and settings.AUTH_USER_CACHE_SECONDS:
+            if len(users) >= MAX_USERS:
+                users.clear()
+            users[user_id] = (
+                now + settings.AUTH_USER_CACHE_SECONDS,
+                version,
+                copy.deepcopy(user),
+            )
+        return user
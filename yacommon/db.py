@@ -0,0 +1,14 @@
+from django.conf import settings
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """Настраивает новое соединение с SQLite через settings.SQLITE_PRAGMAS.
+
+    Большинство PRAGMA действуют только в рамках соединения, поэтому
+    применяются при каждом его открытии.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+            cursor.execute(f'PRAGMA {name} = {value}')
@@ -0,0 +1,170 @@
+"""Общие инструменты нагрузочных бенчмарков.
+
+Замеряет задержку запросов (p50/p95/p99), число SQL-запросов
+и пиковое потребление памяти на запрос, сохраняет результаты
+в JSON и сравнивает их с сохранённым ранее базовым прогоном.
+Бенчмарки обоих проектов импортируют модуль как `yacommon.harness`.
+"""
+import json
+import os
+import platform
+import statistics
+import time
+import tracemalloc
+from http import HTTPStatus
+from io import BytesIO
+from urllib.parse import urlsplit
+from wsgiref.util import setup_testing_defaults
+
+import django
+
+HOST = 'localhost'
+
+
+def setup_django(settings_module, database):
+    """Настраивает Django на отдельную базу для бенчмарков."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    django.setup()
+    from django.conf import settings
+    from django.core.management import call_command
+
+    # Соединения открываются лениво, поэтому имя базы ещё можно подменить.
+    settings.DATABASES['default']['NAME'] = database
+    # В режиме отладки каждый SQL-запрос сохраняется в журнал соединения,
+    # что искажает замеры.
+    settings.DEBUG = False
+    call_command('migrate', verbosity=0)
+
+
+class WSGIClient:
+    """Обращается к WSGI-приложению напрямую, как это делает сервер."""
+
+    def __init__(self, cookies=None):
+        from django.core.wsgi import get_wsgi_application
+
+        self.application = get_wsgi_application()
+        self.cookie_header = '; '.join(
+            f'{morsel.key}={morsel.value}'
+            for morsel in (cookies or {}).values()
+        )
+
+    def get(self, url):
+        parts = urlsplit(url)
+        environ = {
+            'PATH_INFO': parts.path,
+            'QUERY_STRING': parts.query,
+            'HTTP_HOST': HOST,
+            'HTTP_COOKIE': self.cookie_header,
+            'wsgi.input': BytesIO(),
+        }
+        setup_testing_defaults(environ)
+        status = []
+        body = self.application(
+            environ, lambda status_line, headers: status.append(status_line)
+        )
+        try:
+            b''.join(body)
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+        return int(status[0].split()[0])
+
+
+def percentile(sorted_values, fraction):
+    """Перцентиль по ближайшему рангу."""
+    index = max(0, round(fraction * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def checked(request, status):
+    """Оборачивает `request` проверкой кода ответа: ответ с ошибкой
+    или перенаправлением не должен попасть в замеры как обычный.
+    """
+    def run():
+        response = request()
+        code = getattr(response, 'status_code', response)
+        assert code == status, (code, status)
+    return run
+
+
+def measure(request, repeat, status=HTTPStatus.OK):
+    """Замеряет функцию `request`, выполняющую один HTTP-запрос.
+
+    Запрос возвращает ответ тестового клиента или код ответа
+    WSGIClient, который должен быть равен `status`. С `status=None`
+    замеряется произвольная функция без проверки результата.
+    """
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    if status is not None:
+        request = checked(request, status)
+    request()
+    with CaptureQueriesContext(connection) as context:
+        request()
+    # Журнал запросов очищается в начале каждого следующего запроса.
+    queries = len(context.captured_queries)
+    tracemalloc.start()
+    request()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        request()
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return {
+        'p50_ms': round(percentile(latencies, 0.50), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'mean_ms': round(statistics.fmean(latencies), 3),
+        'queries': queries,
+        'peak_memory_kib': round(peak / 1024, 1),
+    }
+
+
+def report(results):
+    print(
+        f'{"сценарий":<45} {"p50":>8} {"p95":>8} {"p99":>8} '
+        f'{"SQL":>5} {"КиБ":>8}'
+    )
+    for name, result in results.items():
+        print(
+            f'{name:<45} {result["p50_ms"]:>8.2f} {result["p95_ms"]:>8.2f} '
+            f'{result["p99_ms"]:>8.2f} {result["queries"]:>5} '
+            f'{result["peak_memory_kib"]:>8.1f}'
+        )
+
+
+def save_baseline(path, results, volumes):
+    data = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'volumes': volumes,
+        'results': results,
+    }
+    with open(path, 'w', encoding='utf-8') as baseline:
+        json.dump(data, baseline, ensure_ascii=False, indent=2)
+
+
+def compare(path, results, tolerance):
+    """Возвращает описания регрессий относительно базового прогона."""
+    with open(path, encoding='utf-8') as baseline:
+        previous = json.load(baseline)['results']
+    regressions = []
+    for name, result in results.items():
+        old = previous.get(name)
+        if old is None:
+            continue
+        if result['queries'] > old['queries']:
+            regressions.append(
+                f'{name}: SQL-запросов {old["queries"]} -> '
+                f'{result["queries"]}'
+            )
+        if result['p95_ms'] > old['p95_ms'] * (1 + tolerance):
+            regressions.append(
+                f'{name}: p95 {old["p95_ms"]} -> {result["p95_ms"]} мс'
+            )
+    return regressions
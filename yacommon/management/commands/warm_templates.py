@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from yacommon.warmup import warm_templates
+
+
+class Command(BaseCommand):
+    help = (
+        'Компилирует все шаблоны проекта: проверяет их перед выкладкой '
+        'и заполняет кеш загрузчика в текущем процессе.'
+    )
+
+    def handle(self, *args, **options):
+        count = warm_templates()
+        self.stdout.write(f'Скомпилировано шаблонов: {count}')
@@ -0,0 +1,218 @@
+"""Замеры каждого запроса без сторонних панелей отладки.
+
+`RequestTimingMiddleware` собирает число SQL-запросов и время в базе
+(через `connection.execute_wrapper`), повторяющиеся запросы (признак
+N+1), время работы view и отрисовки шаблона. Результат добавляется
+в заголовок `Server-Timing` и, если включено, пишется в журнал одной
+строкой JSON.
+
+`RequestTimingMiddleware` ставится первым в MIDDLEWARE, чтобы учесть
+запросы остальных middleware, а `ViewTimingMiddleware` — последним:
+он отмечает начало и конец view, в том числе у ответов без шаблона.
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Сколько повторяющихся запросов выводить в журнал.
+DUPLICATES_IN_LOG = 5
+
+
+class QueryCollector:
+    """Считает запросы и время их выполнения."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.statements[sql] += 1
+
+    @property
+    def duplicates(self):
+        """Запросы, выполненные больше одного раза, с числом повторов."""
+        return Counter({
+            sql: count for sql, count in self.statements.items() if count > 1
+        })
+
+
+class RequestTiming:
+    """Отметки времени одного запроса."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.view_start = self.view_end = None
+        self.render_start = self.render_end = None
+        self.queries = QueryCollector()
+
+    @staticmethod
+    def elapsed(start, end):
+        if start is None or end is None:
+            return 0.0
+        return end - start
+
+    def start_render(self, response):
+        """Отмечает конец view и начало отрисовки шаблона ответа."""
+        self.view_end = self.render_start = time.perf_counter()
+        response.add_post_render_callback(
+            lambda response: setattr(self, 'render_end', time.perf_counter())
+        )
+
+    def as_dict(self, end):
+        return {
+            'total_ms': round(self.elapsed(self.start, end) * 1000, 2),
+            'view_ms': round(
+                self.elapsed(self.view_start, self.view_end) * 1000, 2
+            ),
+            'render_ms': round(
+                self.elapsed(self.render_start, self.render_end) * 1000, 2
+            ),
+            'db_ms': round(self.queries.duration * 1000, 2),
+            'queries': self.queries.count,
+            'duplicate_queries': sum(self.queries.duplicates.values()),
+        }
+
+
+class RequestTimingMiddleware:
+    """Заголовок Server-Timing и журнал с замерами запроса.
+
+    Включается настройками REQUEST_TIMING (заголовок) и
+    REQUEST_TIMING_LOG (журнал).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Как у MiddlewareMixin: по этому признаку Django под ASGI
+            # не переводит остальную цепочку в синхронный поток.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    @staticmethod
+    def enabled():
+        return settings.REQUEST_TIMING or settings.REQUEST_TIMING_LOG
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.acall(request)
+        if not self.enabled():
+            return self.get_response(request)
+        request.timing = timing = RequestTiming()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(timing.queries)
+                )
+            response = self.get_response(request)
+        return self.finish(request, response, timing)
+
+    async def acall(self, request):
+        """
+        Вариант для ASGI. Соединения с базой у каждого потока свои,
+        поэтому запросы считаются только у view, которые сами
+        подключают `request.timing` в своём потоке (`news.async_views`).
+        """
+        if not self.enabled():
+            return await self.get_response(request)
+        request.timing = timing = RequestTiming()
+        response = await self.get_response(request)
+        return self.finish(request, response, timing)
+
+    def finish(self, request, response, timing):
+        end = time.perf_counter()
+        if timing.view_start is not None and timing.view_end is None:
+            timing.view_end = end
+        metrics = timing.as_dict(end)
+        if settings.REQUEST_TIMING:
+            response['Server-Timing'] = self.server_timing(metrics)
+        if settings.REQUEST_TIMING_LOG:
+            self.log(request, response, timing, metrics)
+        return response
+
+    @staticmethod
+    def server_timing(metrics):
+        return ', '.join((
+            'db;dur={db_ms};desc="{queries} queries, '
+            '{duplicate_queries} duplicated"'.format(**metrics),
+            'view;dur={view_ms}'.format(**metrics),
+            'render;dur={render_ms}'.format(**metrics),
+            'total;dur={total_ms}'.format(**metrics),
+        ))
+
+    @staticmethod
+    def log(request, response, timing, metrics):
+        duplicates = timing.queries.duplicates.most_common(DUPLICATES_IN_LOG)
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            **metrics,
+            'duplicates': [
+                {'sql': sql, 'count': count} for sql, count in duplicates
+            ],
+        }, ensure_ascii=False))
+
+
+class ViewTimingMiddleware:
+    """Отметки начала и конца view для RequestTimingMiddleware.
+
+    Ставится последним в MIDDLEWARE: ответ возвращается в него сразу
+    после view и отрисовки шаблона, до обработки остальными middleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.acall(request)
+        return self.finish(request, self.get_response(request))
+
+    async def acall(self, request):
+        return self.finish(request, await self.get_response(request))
+
+    @staticmethod
+    def finish(request, response):
+        """Конец view у ответа без шаблона."""
+        timing = getattr(request, 'timing', None)
+        if timing is not None and timing.view_start is not None:
+            if timing.view_end is None:
+                timing.view_end = time.perf_counter()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if hasattr(request, 'timing'):
+            request.timing.view_start = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        """Шаблон отрисовывается сразу после всех process_template_response.
+
+        Уже отрисованный ответ (асинхронные view отрисовывают его
+        в своём потоке) отмечает view и шаблон сам.
+        """
+        timing = getattr(request, 'timing', None)
+        if timing is not None and not response.is_rendered:
+            timing.start_render(response)
+        return response
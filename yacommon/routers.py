@@ -0,0 +1,112 @@
+"""Чтение из реплик базы данных.
+
+Запросы GET и HEAD читают модели приложений DATABASE_REPLICATED_APPS
+из одной из реплик `settings.DATABASE_REPLICAS`, выбранной на весь
+запрос. Всё остальное идёт в основную базу `default`: любые записи,
+запросы с другими методами, а также команды и воркеры, которые
+работают вне запроса.
+
+Реплика отстаёт от основной базы, поэтому после изменяющего запроса
+браузер получает cookie PIN_COOKIE. Пока она не истекла
+(DATABASE_REPLICA_PIN_SECONDS), его запросы читают из основной базы
+и видят собственные изменения. Код, который кеширует прочитанное
+под версией данных, читает свежие изменения в блоке `primary()`.
+"""
+import asyncio
+import contextvars
+import random
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_COOKIE = 'use_primary'
+SAFE_METHODS = ('GET', 'HEAD')
+
+# None — вне запроса, иначе база, из которой читает запрос.
+read_database = contextvars.ContextVar('read_database', default=None)
+
+
+@contextmanager
+def primary():
+    """Чтение из основной базы внутри блока."""
+    token = read_database.set(DEFAULT_DB_ALIAS)
+    try:
+        yield
+    finally:
+        read_database.reset(token)
+
+
+class PrimaryReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        database = read_database.get()
+        if (
+            database is not None
+            and model._meta.app_label in settings.DATABASE_REPLICATED_APPS
+        ):
+            return database
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Реплики — копии основной базы, связи между ними допустимы."""
+        return True
+
+
+class PrimaryPinMiddleware:
+    """Выбирает базу для чтения в запросе и закрепляет основную базу
+    за браузером после изменяющего запроса.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Как у MiddlewareMixin: цепочка остаётся асинхронной.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.acall(request)
+        token = read_database.set(self.choose_database(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            read_database.reset(token)
+        return self.pin(request, response)
+
+    async def acall(self, request):
+        token = read_database.set(self.choose_database(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            read_database.reset(token)
+        return self.pin(request, response)
+
+    @staticmethod
+    def choose_database(request):
+        """Одна база на весь запрос: иначе разные его запросы могли бы
+        прочитать разные реплики с разным отставанием.
+        """
+        if (
+            request.method not in SAFE_METHODS
+            or PIN_COOKIE in request.COOKIES
+            or not settings.DATABASE_REPLICAS
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    @staticmethod
+    def pin(request, response):
+        if request.method not in SAFE_METHODS and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=settings.DATABASE_REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,240 @@
+"""Потоковые импорт и экспорт моделей в JSONL и CSV.
+
+Файл читается и пишется пакетами постоянного размера, поэтому память
+не зависит от объёма данных. После каждого пакета рядом с файлом
+сохраняется контрольная точка `<файл>.checkpoint`: прерванная команда
+при повторном запуске продолжит с места остановки.
+"""
+import csv
+import json
+import os
+from abc import ABCMeta, abstractmethod
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+
+FORMATS = ('jsonl', 'csv')
+BATCH_SIZE = 2000
+STDOUT = '-'
+
+
+def batched(objects, size):
+    objects = iter(objects)
+    while batch := list(islice(objects, size)):
+        yield batch
+
+
+def get_format(path, file_format=None):
+    """Формат из аргумента команды или из расширения файла."""
+    file_format = (
+        file_format or os.path.splitext(path)[1].lstrip('.').lower()
+    )
+    if file_format not in FORMATS:
+        raise CommandError(
+            f'Неизвестный формат {file_format!r}, укажите --format: '
+            f'{", ".join(FORMATS)}.'
+        )
+    return file_format
+
+
+def read_records(file, file_format, skip=0):
+    """Записи файла как словари, начиная с записи номер `skip`."""
+    if file_format == 'csv':
+        yield from islice(csv.DictReader(file), skip, None)
+        return
+    lines = (line for line in file if line.strip())
+    # Пропущенные строки JSONL даже не разбираются.
+    for line in islice(lines, skip, None):
+        yield json.loads(line)
+
+
+class RecordWriter:
+    """Пишет записи в JSONL или CSV."""
+
+    def __init__(self, file, file_format, fields, header=True):
+        self.file = file
+        self.file_format = file_format
+        self.fields = fields
+        if file_format == 'csv':
+            self.writer = csv.writer(file)
+            if header:
+                self.writer.writerow(fields)
+
+    def write(self, values):
+        # Даты пишутся с микросекундами: по времени комментариев
+        # строятся курсоры страниц.
+        values = [
+            value.isoformat() if hasattr(value, 'isoformat') else value
+            for value in values
+        ]
+        if self.file_format == 'csv':
+            self.writer.writerow(values)
+            return
+        self.file.write(json.dumps(
+            dict(zip(self.fields, values)), ensure_ascii=False
+        ) + '\n')
+
+
+class Checkpoint:
+    """Сколько обработано: число записей при импорте, последний id
+    и длина файла при экспорте. Заменяется атомарно, чтобы пережить
+    падение процесса.
+    """
+
+    def __init__(self, path):
+        self.path = f'{path}.checkpoint'
+
+    def load(self, *default):
+        """Сохранённые числа или `default`, если точки нет."""
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                return tuple(int(value) for value in file.read().split())
+        except FileNotFoundError:
+            return default
+
+    def save(self, *values):
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as file:
+            file.write(' '.join(str(value) for value in values))
+        os.replace(temporary, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def to_python(model, fields, record):
+    """Значения записи, приведённые к типам полей модели."""
+    values = {}
+    for name in fields:
+        value = record.get(name)
+        if value in (None, ''):
+            continue
+        field = model._meta.get_field(name)
+        try:
+            value = field.to_python(value)
+            field.run_validators(value)
+        except ValidationError as error:
+            raise CommandError(f'{name}: {" ".join(error.messages)}')
+        values[field.attname] = value
+    return values
+
+
+class TransferCommand(BaseCommand):
+    """Общие аргументы импорта и экспорта.
+
+    Наследники задают `kinds`: имя набора данных — модель и поля.
+    Если набор один, его имя в командной строке не указывается.
+    """
+    kinds = {}
+
+    def add_arguments(self, parser):
+        if len(self.kinds) > 1:
+            parser.add_argument('kind', choices=sorted(self.kinds))
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Начать заново, не учитывая контрольную точку.'
+        )
+
+    def get_kind(self, options):
+        return self.kinds[options.get('kind') or next(iter(self.kinds))]
+
+
+class ImportCommand(TransferCommand, metaclass=ABCMeta):
+    """Загружает файл пакетами: пакет сохраняется в отдельной транзакции,
+    после неё запоминается контрольная точка.
+    """
+
+    @abstractmethod
+    def import_batch(self, model, records):
+        """Сохраняет пакет записей, уже приведённых к типам полей."""
+
+    def handle(self, *args, **options):
+        model, fields = self.get_kind(options)
+        path = options['path']
+        file_format = get_format(path, options['format'])
+        checkpoint = Checkpoint(path)
+        if options['restart']:
+            checkpoint.clear()
+        done, = checkpoint.load(0)
+        if done:
+            self.stdout.write(f'Продолжаем с записи {done + 1}.')
+        with open(path, encoding='utf-8', newline='') as file:
+            records = read_records(file, file_format, skip=done)
+            for batch in batched(records, options['batch_size']):
+                try:
+                    with transaction.atomic():
+                        self.import_batch(model, [
+                            to_python(model, fields, record)
+                            for record in batch
+                        ])
+                # Внешние ключи SQLite проверяет при фиксации транзакции.
+                except (CommandError, IntegrityError) as error:
+                    raise CommandError(
+                        f'Записи {done + 1}-{done + len(batch)}: {error}'
+                    )
+                done += len(batch)
+                checkpoint.save(done)
+        self.finish_import(model)
+        checkpoint.clear()
+        self.stdout.write(f'Загружено записей: {done}')
+
+    def finish_import(self, model):
+        """Вызывается один раз после загрузки всего файла."""
+
+
+class ExportCommand(TransferCommand):
+    """Выгружает записи в порядке id; контрольная точка — последний
+    выгруженный id и длина файла после него. При продолжении файл
+    обрезается до этой длины: строки, записанные после контрольной
+    точки, выгрузятся ещё раз.
+    """
+
+    def handle(self, *args, **options):
+        model, fields = self.get_kind(options)
+        path = options['path']
+        file_format = get_format(path, options['format'])
+        if path == STDOUT:
+            exported = self.export(
+                model, fields, self.stdout, file_format, 0, None,
+                options['batch_size'],
+            )
+        else:
+            checkpoint = Checkpoint(path)
+            if options['restart']:
+                checkpoint.clear()
+            last_id, size = checkpoint.load(0, 0)
+            mode = 'r+' if last_id else 'w'
+            with open(path, mode, encoding='utf-8', newline='') as file:
+                file.seek(size)
+                file.truncate()
+                exported = self.export(
+                    model, fields, file, file_format, last_id, checkpoint,
+                    options['batch_size'],
+                )
+            checkpoint.clear()
+        self.stderr.write(f'Выгружено записей: {exported}')
+
+    def export(
+        self, model, fields, file, file_format, last_id, checkpoint,
+        batch_size
+    ):
+        queryset = model.objects.filter(pk__gt=last_id).order_by('pk')
+        rows = queryset.values_list('pk', *fields).iterator(
+            chunk_size=batch_size
+        )
+        writer = RecordWriter(file, file_format, fields, header=not last_id)
+        exported = 0
+        for batch in batched(rows, batch_size):
+            for row in batch:
+                writer.write(row[1:])
+            exported += len(batch)
+            if checkpoint:
+                file.flush()
+                checkpoint.save(batch[-1][0], file.tell())
+        return exported